@@ -0,0 +1,369 @@
+# 캐시 유틸리티 - backend/caches.py
+# 메모리 LRU 캐시, OCR 결과 캐시(메모리 + SQLite 2단계), 채팅 세션별 대화 맥락 캐시, 첫 질문 응답 캐시를 제공합니다.
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class LRUTTLCache:
+    """크기 제한과 TTL 을 가진 메모리 LRU 캐시 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """값 조회 (만료되었거나 없으면 None)"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """값 저장 (용량 초과 시 가장 오래 사용하지 않은 항목 제거, ttl_seconds 로 항목별 TTL 단축 가능)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """항목 제거"""
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class OCRResultCache:
+    """이미지 내용 해시를 키로 하는 OCR 결과 캐시 (메모리 LRU + SQLite 테이블)"""
+
+    def __init__(self, db_path: str = "./ocr_cache.db", memory_entries: int = 256,
+                 memory_ttl_seconds: float = 3600, disk_entries: int = 10000,
+                 disk_ttl_seconds: float = 7 * 24 * 3600):
+        self.memory = LRUTTLCache(memory_entries, memory_ttl_seconds)
+        self.db_path = db_path
+        self.disk_entries = max(1, disk_entries)
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_cache_last_access ON ocr_cache (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, variant: str = "") -> str:
+        """디코딩된 이미지 바이트의 SHA-256 해시 (모델/언어, 전처리 설정이 다르면 다른 키)"""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{digest}:{variant}" if variant else digest
+
+    async def get(self, key: str) -> Optional[str]:
+        """메모리 → SQLite 순서로 조회하고, SQLite 적중 시 메모리에 올립니다"""
+        text = self.memory.get(key)
+        if text is not None:
+            self.memory_hits += 1
+            return text
+
+        text = await asyncio.to_thread(self._disk_get, key)
+        if text is not None:
+            self.disk_hits += 1
+            self.memory.set(key, text)
+            return text
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, text: str):
+        """두 단계 모두에 저장"""
+        self.memory.set(key, text)
+        await asyncio.to_thread(self._disk_set, key, text)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, created_at FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            text, created_at = row
+            if created_at + self.disk_ttl_seconds < now:
+                self._conn.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return text
+
+    def _disk_set(self, key: str, text: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            # 만료 항목 정리 후 용량을 넘는 만큼 오래 사용하지 않은 항목 제거
+            self._conn.execute("DELETE FROM ocr_cache WHERE created_at < ?", (now - self.disk_ttl_seconds,))
+            count = self._conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+            overflow = count - self.disk_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM ocr_cache WHERE key IN "
+                    "(SELECT key FROM ocr_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.disk_evictions += overflow
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "memory": self.memory.stats(),
+            "disk_max_entries": self.disk_entries,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+class ConversationCache:
+    """채팅 세션별 최근 메시지 링 버퍼 (이벤트 루프 안에서만 사용)
+
+    세션마다 최근 max_messages 개(와 세션 요약이 있으면 요약)만 보관하고, 세션 수나 전체 메시지 크기가 한도를 넘으면
+    가장 오래 사용하지 않은 세션부터 제거합니다. 사용자 → 최근 세션 id 도 함께 기억해
+    다음 턴의 프롬프트를 DB 조회 없이 구성할 수 있게 합니다.
+    프로세스마다 따로 유지되므로 여러 워커로 실행하면 다른 워커의 삭제는 반영되지 않습니다.
+    """
+
+    def __init__(self, max_messages: int = 10, max_sessions: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.max_messages = max(1, max_messages)
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max(1, max_bytes)
+        self._sessions: "OrderedDict[int, deque]" = OrderedDict()
+        self._session_bytes: Dict[int, int] = {}
+        self._summaries: Dict[int, Tuple[str, int]] = {}
+        self._latest_sessions: "OrderedDict[int, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _message_size(message: Dict[str, Any]) -> int:
+        return len(message["content"].encode("utf-8"))
+
+    def latest_session(self, user_id: int) -> Optional[int]:
+        """사용자의 최근 채팅 세션 id (모르면 None)"""
+        session_id = self._latest_sessions.get(user_id)
+        if session_id is not None:
+            self._latest_sessions.move_to_end(user_id)
+        return session_id
+
+    def set_latest_session(self, user_id: int, session_id: int):
+        self._latest_sessions[user_id] = session_id
+        self._latest_sessions.move_to_end(user_id)
+        while len(self._latest_sessions) > self.max_sessions:
+            self._latest_sessions.popitem(last=False)
+
+    def get(self, session_id: int) -> Optional[List[Dict[str, Any]]]:
+        """세션의 최근 메시지 (오래된 순, {"id", "role", "content"}, 캐시에 없으면 None)"""
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            self.misses += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        return list(buffer)
+
+    def fill(self, session_id: int, messages: Iterable[Dict[str, Any]],
+             summary: Optional[str] = None, summary_until_id: Optional[int] = None):
+        """DB 에서 읽은 최근 메시지(오래된 순)와 세션 요약으로 세션 버퍼를 채움 (새 세션이면 빈 목록)"""
+        self._drop_buffer(session_id)
+        buffer = deque(maxlen=self.max_messages)
+        self._sessions[session_id] = buffer
+        self._session_bytes[session_id] = 0
+        for message in messages:
+            self._push(session_id, buffer, message)
+        if summary:
+            self._store_summary(session_id, summary, summary_until_id or 0)
+        self._evict()
+
+    def append(self, session_id: int, role: str, content: str,
+               message_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """DB 에 저장한 메시지를 캐시에도 반영 (버퍼가 없는 세션은 다음 조회 때 DB 에서 채움)
+
+        캐시에 넣은 메시지 딕셔너리를 반환하므로, 저장이 끝난 뒤 id 를 채워 넣을 수 있습니다.
+        """
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            return None
+        self._sessions.move_to_end(session_id)
+        message = {"id": message_id, "role": role, "content": content}
+        self._push(session_id, buffer, message)
+        self._evict()
+        return message
+
+    def get_summary(self, session_id: int) -> Tuple[Optional[str], int]:
+        """세션 요약과 요약에 포함된 마지막 메시지 id (요약이 없으면 (None, 0))"""
+        return self._summaries.get(session_id, (None, 0))
+
+    def set_summary(self, session_id: int, summary: str, until_id: int):
+        """새로 만든 요약 반영 (버퍼가 없는 세션은 다음 조회 때 DB 에서 채움)"""
+        if session_id not in self._sessions:
+            return
+        self._store_summary(session_id, summary, until_id)
+        self._evict()
+
+    def uncovered_count(self, session_id: int) -> int:
+        """버퍼의 메시지 중 아직 요약에 포함되지 않은 메시지 수"""
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            return 0
+        _, until_id = self.get_summary(session_id)
+        return sum(1 for message in buffer if message.get("id") is None or message["id"] > until_id)
+
+    def _store_summary(self, session_id: int, summary: str, until_id: int):
+        previous, _ = self._summaries.get(session_id, ("", 0))
+        delta = len(summary.encode("utf-8")) - len(previous.encode("utf-8"))
+        self._summaries[session_id] = (summary, until_id)
+        self._session_bytes[session_id] += delta
+        self.total_bytes += delta
+
+    def _push(self, session_id: int, buffer: deque, message: Dict[str, str]):
+        if len(buffer) == buffer.maxlen:
+            dropped = self._message_size(buffer[0])
+            self._session_bytes[session_id] -= dropped
+            self.total_bytes -= dropped
+        buffer.append(message)
+        size = self._message_size(message)
+        self._session_bytes[session_id] += size
+        self.total_bytes += size
+
+    def _evict(self):
+        # 방금 사용한 세션 하나는 남겨 둡니다 (한 세션이 한도보다 커도 이번 턴은 캐시 사용)
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            session_id, _ = self._sessions.popitem(last=False)
+            self.total_bytes -= self._session_bytes.pop(session_id)
+            self._summaries.pop(session_id, None)
+            self.evictions += 1
+
+    def _drop_buffer(self, session_id: int):
+        if self._sessions.pop(session_id, None) is not None:
+            self.total_bytes -= self._session_bytes.pop(session_id)
+            self._summaries.pop(session_id, None)
+
+    def invalidate(self, session_id: int):
+        """세션 버퍼와 요약만 제거 (다음 조회 때 DB 에서 다시 채움, 예: 지연 저장 실패)"""
+        self._drop_buffer(session_id)
+
+    def discard(self, session_id: int):
+        """세션 버퍼 제거 (세션 삭제 시), 이 세션을 가리키는 사용자 매핑도 함께 제거"""
+        self._drop_buffer(session_id)
+        for user_id in [uid for uid, sid in self._latest_sessions.items() if sid == session_id]:
+            del self._latest_sessions[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "messages": sum(len(buffer) for buffer in self._sessions.values()),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "summaries": len(self._summaries),
+            "users": len(self._latest_sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class ChatResponseCache:
+    """업스트림 메시지 목록 전체의 해시를 키로 하는 AI 응답 캐시 (이전 대화가 없는 첫 질문에만 사용)
+
+    적중할 때마다 원래 호출에 걸린 시간과 사용 토큰을 절약량으로 집계합니다.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 24 * 3600):
+        self.cache = LRUTTLCache(max_entries, ttl_seconds)
+        self.stores = 0
+        self.saved_latency_ms = 0.0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def make_key(messages: List[Dict[str, Any]]) -> str:
+        payload = json.dumps(messages, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 {"response", "usage", "latency_ms"} (없으면 None)"""
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.saved_latency_ms += entry["latency_ms"]
+            self.saved_tokens += int((entry["usage"] or {}).get("total_tokens") or 0)
+        return entry
+
+    def set(self, key: str, response: str, usage: Optional[Dict[str, Any]], latency_ms: float):
+        self.cache.set(key, {"response": response, "usage": usage or {}, "latency_ms": latency_ms})
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats.update({
+            "stores": self.stores,
+            "saved_latency_ms": round(self.saved_latency_ms, 1),
+            "saved_tokens": self.saved_tokens,
+        })
+        return stats
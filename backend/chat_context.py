@@ -0,0 +1,173 @@
+# 대화 맥락 구성 및 요약 - backend/chat_context.py
+# 업스트림 프롬프트를 추정 토큰 예산 안에서 구성하고, 오래된 대화는 세션별 누적 요약으로 대체합니다.
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from caches import ConversationCache
+from database import ChatMessage, ChatSession
+from upstream import UpstreamClient
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_MODE_RECENT = "recent"
+CONTEXT_MODE_SUMMARY = "summary"
+
+# 메시지 하나마다 붙는 역할/구분자 토큰 (OpenAI 채팅 형식 기준 대략값)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_SYSTEM_PROMPT = """당신은 수학 튜터링 대화를 요약하는 도우미입니다.
+이전 요약과 새 대화를 합쳐 하나의 요약으로 다시 작성하세요.
+- 학생이 푸는 문제(수식, 조건 포함), 지금까지 진행된 풀이 단계, 학생이 이해한 것과 어려워한 것을 남기세요
+- 인사, 반복된 확인 질문은 빼세요
+- 한국어로 {max_chars}자 이내, 문장 목록으로 작성하세요"""
+
+
+def estimate_tokens(text: str) -> int:
+    """문자열의 토큰 수 추정 (한글 등 비 ASCII 문자는 글자당 1토큰, ASCII 는 4글자당 1토큰)"""
+    if not text:
+        return 0
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def summary_message(summary: str) -> Dict[str, str]:
+    return {"role": "system", "content": f"이전 대화 요약:\n{summary}"}
+
+
+def build_prompt(system_prompt: str, history: List[Dict[str, Any]], user_message: Dict[str, str],
+                 token_budget: int, summary: Optional[str] = None) -> Tuple[List[Dict[str, str]], int]:
+    """시스템 프롬프트 + (요약) + 최근 대화 + 현재 메시지를 추정 토큰 예산 안에서 구성
+
+    최근 대화는 최신 메시지부터 예산이 허락하는 만큼만 넣습니다.
+    시스템 프롬프트, 요약, 현재 메시지는 예산을 넘더라도 항상 포함합니다.
+    (업스트림 메시지 목록, 추정 토큰 수) 를 반환합니다.
+    """
+    head = [{"role": "system", "content": system_prompt}]
+    if summary:
+        head.append(summary_message(summary))
+    used = sum(estimate_message_tokens(message) for message in head) + estimate_message_tokens(user_message)
+
+    included: List[Dict[str, str]] = []
+    for message in reversed(history):
+        cost = estimate_message_tokens(message)
+        if used + cost > token_budget:
+            break
+        included.append({"role": message["role"], "content": message["content"]})
+        used += cost
+    included.reverse()
+    return head + included + [user_message], used
+
+
+class ConversationSummarizer:
+    """세션별 누적 요약을 백그라운드에서 갱신
+
+    요약에 포함되지 않은 메시지가 trigger_messages 개 이상 쌓이면, 가장 최근 keep_recent_messages 개를
+    남기고 나머지를 이전 요약과 합쳐 다시 요약합니다. 세션마다 동시에 하나의 갱신만 실행합니다.
+    """
+
+    def __init__(self, upstream: UpstreamClient, session_factory: Callable[[], AsyncSession],
+                 cache: ConversationCache, keep_recent_messages: int = 4, trigger_messages: int = 10,
+                 max_summary_chars: int = 600, max_input_tokens: int = 6000):
+        self.upstream = upstream
+        self.session_factory = session_factory
+        self.cache = cache
+        self.keep_recent_messages = max(0, keep_recent_messages)
+        # 캐시된 링 버퍼보다 많이 쌓일 때까지 기다리면 요약이 시작되지 않으므로 버퍼 크기로 제한합니다
+        self.trigger_messages = max(self.keep_recent_messages + 1, min(trigger_messages, cache.max_messages))
+        self.max_summary_chars = max_summary_chars
+        self.max_input_tokens = max_input_tokens
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.refreshes = 0
+        self.failures = 0
+
+    def maybe_schedule(self, session_id: int):
+        """요약되지 않은 메시지가 충분히 쌓였으면 요약 갱신 예약 (대기하지 않음)"""
+        if session_id in self._tasks:
+            return
+        if self.cache.uncovered_count(session_id) < self.trigger_messages:
+            return
+        task = asyncio.create_task(self._refresh(session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    async def _refresh(self, session_id: int):
+        try:
+            async with self.session_factory() as db:
+                chat_session = await db.get(ChatSession, session_id)
+                if chat_session is None:
+                    return
+                covered_until = chat_session.summary_until_id or 0
+                result = await db.execute(
+                    select(ChatMessage.id, ChatMessage.role, ChatMessage.content).where(
+                        ChatMessage.session_id == session_id,
+                        ChatMessage.id > covered_until
+                    ).order_by(ChatMessage.id.asc())
+                )
+                rows = result.all()
+                if self.keep_recent_messages:
+                    rows = rows[:-self.keep_recent_messages]
+                if not rows:
+                    return
+
+                summary = await self._summarize(chat_session.summary, rows)
+                chat_session.summary = summary
+                chat_session.summary_until_id = rows[-1].id
+                chat_session.summary_updated_at = datetime.utcnow()
+                await db.commit()
+
+            self.cache.set_summary(session_id, summary, rows[-1].id)
+            self.refreshes += 1
+            logger.info(f"대화 요약 갱신: 세션 {session_id}, 메시지 {len(rows)}개 요약, {len(summary)}자")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"대화 요약 갱신 실패 (세션 {session_id}): {e}")
+
+    async def _summarize(self, previous_summary: Optional[str], rows) -> str:
+        """이전 요약 + 새 메시지를 업스트림으로 요약 (입력이 길면 오래된 메시지부터 생략)"""
+        lines = []
+        used = estimate_tokens(previous_summary or "")
+        for row in reversed(rows):
+            line = f"{'학생' if row.role == 'user' else '튜터'}: {row.content}"
+            used += estimate_tokens(line)
+            if used > self.max_input_tokens:
+                break
+            lines.append(line)
+        transcript = "\n".join(reversed(lines))
+
+        content = f"이전 요약:\n{previous_summary or '(없음)'}\n\n새 대화:\n{transcript}"
+        response = await self.upstream.post([
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT.format(max_chars=self.max_summary_chars)},
+            {"role": "user", "content": content},
+        ])
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", "Unknown API error"))
+        return data["choices"][0]["message"]["content"].strip()
+
+    async def close(self):
+        """진행 중인 요약 갱신 취소 (앱 종료 시)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._tasks),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "trigger_messages": self.trigger_messages,
+            "keep_recent_messages": self.keep_recent_messages,
+        }
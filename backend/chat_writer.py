@@ -0,0 +1,220 @@
+# 채팅 메시지 지연 일괄 저장 - backend/chat_writer.py
+# 여러 요청의 ChatMessage INSERT 를 모아 짧은 간격마다 하나의 트랜잭션으로 커밋합니다 (write-behind).
+# SQLite 는 쓰기 잠금이 하나뿐이라 요청마다 커밋하면 커밋끼리 줄을 서게 되므로, 커밋 횟수를 줄여 대기를 없앱니다.
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# 다시 시도해도 결과가 같은 오류 (외래 키 위반 등) - 재시도하지 않고 바로 요청별 저장으로 넘어갑니다
+PERMANENT_ERRORS = (IntegrityError, DataError, ProgrammingError)
+
+Submission = Tuple[int, List[Tuple[str, str]], asyncio.Future]
+
+
+class ChatMessageWriter:
+    """채팅 메시지 write-behind 큐
+
+    submit 은 메시지를 큐에 넣고 바로 반환하며, 저장된 메시지 id 목록으로 완료되는 Future 를 돌려줍니다.
+    첫 메시지가 들어온 뒤 batch_window_ms 가 지나거나 대기 행이 max_batch_rows 개가 되면 한 트랜잭션으로
+    커밋하고, 일시적인 오류면 max_attempts 번까지 다시 시도합니다. 그래도 실패하면 요청(submit)마다 따로
+    커밋해서, 삭제된 세션처럼 문제가 있는 요청만 실패하고 다른 사용자의 메시지는 저장됩니다.
+    close 는 남은 메시지를 모두 저장한 뒤 끝납니다.
+    사용자별로 저장 중인 Future 를 추적하므로, 기록 조회 전에 wait_for_user 로 그 사용자의 쓰기를 기다리면
+    방금 보낸 메시지도 조회됩니다 (read-your-writes).
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], batch_window_ms: float = 20,
+                 max_batch_rows: int = 200, max_attempts: int = 3):
+        self.session_factory = session_factory
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.max_attempts = max(1, max_attempts)
+        self._pending: List[Submission] = []
+        self._pending_rows = 0
+        self._user_writes: Dict[int, Set[asyncio.Future]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.batches = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.fallback_flushes = 0
+        self.largest_batch = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        """앱 시작 시 저장 루프 시작"""
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_task_done)
+
+    @property
+    def accepting(self) -> bool:
+        """저장 루프가 실행 중이고 종료 중이 아님 (아니면 호출자가 직접 저장)"""
+        return self._task is not None and not self._task.done() and not self._closing
+
+    def _on_task_done(self, task: asyncio.Task):
+        """저장 루프가 예외로 끝나면 아직 저장되지 않은 Future 를 모두 실패 처리 (기다리는 요청이 멈추지 않도록)"""
+        if task.cancelled():
+            error: BaseException = RuntimeError("채팅 메시지 저장 루프가 취소되었습니다")
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.error(f"채팅 메시지 저장 루프 비정상 종료: {error!r}")
+        else:
+            return
+        futures = [future for writes in self._user_writes.values() for future in writes]
+        futures.extend(future for _, _, future in self._pending)
+        self._pending, self._pending_rows = [], 0
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def submit(self, user_id: int, session_id: int, messages: List[Tuple[str, str]]) -> asyncio.Future:
+        """(role, content) 메시지들을 저장 큐에 추가 (기다리지 않음)"""
+        if not self.accepting:
+            raise RuntimeError("채팅 메시지 저장 큐가 실행 중이 아닙니다")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((session_id, messages, future))
+        self._pending_rows += len(messages)
+
+        writes = self._user_writes.setdefault(user_id, set())
+        writes.add(future)
+        future.add_done_callback(lambda done: self._forget(user_id, done))
+        self._wakeup.set()
+        return future
+
+    def _forget(self, user_id: int, future: asyncio.Future):
+        writes = self._user_writes.get(user_id)
+        if writes is not None:
+            writes.discard(future)
+            if not writes:
+                del self._user_writes[user_id]
+
+    async def wait_for_user(self, user_id: int, timeout: float = 10.0):
+        """이 사용자가 보낸 메시지 중 아직 저장되지 않은 것이 있으면 저장될 때까지 대기 (최대 timeout 초)"""
+        writes = self._user_writes.get(user_id)
+        if writes:
+            # gather 와 달리 wait 는 호출자가 취소되어도 저장 Future 를 취소하지 않습니다
+            _, pending = await asyncio.wait(list(writes), timeout=timeout)
+            if pending:
+                logger.warning(f"채팅 메시지 저장 대기 시간 초과: 사용자 {user_id}, {len(pending)}건 미저장")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # 첫 메시지 이후 배치 창 동안 더 모읍니다 (행 수가 차거나 종료 중이면 바로 저장)
+            deadline = loop.time() + self.batch_window
+            while self._pending_rows < self.max_batch_rows and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            self._wakeup.clear()
+
+            batch, self._pending, self._pending_rows = self._pending, [], 0
+            if batch:
+                await self._flush(batch)
+            if self._closing and not self._pending:
+                return
+
+    async def _flush(self, batch: List[Submission]):
+        row_count = sum(len(messages) for _, messages, _ in batch)
+        started = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                ids = await self._commit(batch)
+                break
+            except Exception as e:
+                permanent = isinstance(e, PERMANENT_ERRORS)
+                if permanent or attempt == self.max_attempts:
+                    logger.error(f"채팅 메시지 일괄 저장 실패: {row_count}행, {e}")
+                    await self._flush_each(batch, e)
+                    return
+                logger.warning(f"채팅 메시지 일괄 저장 재시도 {attempt}/{self.max_attempts - 1}: {e}")
+                await asyncio.sleep(0.05 * 2 ** (attempt - 1))
+
+        self.batches += 1
+        self.rows_written += row_count
+        self.largest_batch = max(self.largest_batch, row_count)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self._resolve(batch, ids)
+
+    async def _commit(self, batch: List[Submission]) -> List[int]:
+        """batch 의 메시지를 한 트랜잭션으로 저장하고 id 목록 반환"""
+        rows = [
+            ChatMessage(session_id=session_id, role=role, content=content)
+            for session_id, messages, _ in batch
+            for role, content in messages
+        ]
+        async with self.session_factory() as db:
+            db.add_all(rows)
+            await db.commit()
+        return [row.id for row in rows]
+
+    async def _flush_each(self, batch: List[Submission], batch_error: Exception):
+        """일괄 저장이 실패한 batch 를 요청마다 따로 커밋 (문제가 있는 요청만 실패)"""
+        if len(batch) == 1:
+            self._fail(batch, batch_error)
+            return
+        self.fallback_flushes += 1
+        for submission in batch:
+            try:
+                ids = await self._commit([submission])
+            except Exception as e:
+                logger.error(f"채팅 메시지 저장 실패: 세션 {submission[0]}, {e}")
+                self._fail([submission], e)
+                continue
+            self.batches += 1
+            self.rows_written += len(submission[1])
+            self._resolve([submission], ids)
+
+    def _fail(self, batch: List[Submission], error: Exception):
+        self.rows_failed += sum(len(messages) for _, messages, _ in batch)
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    @staticmethod
+    def _resolve(batch: List[Submission], ids: List[int]):
+        ids = iter(ids)
+        for _, messages, future in batch:
+            message_ids = [next(ids) for _ in messages]
+            if not future.done():
+                future.set_result(message_ids)
+
+    async def close(self):
+        """앱 종료 시 남은 메시지를 모두 저장"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info(f"채팅 메시지 저장 큐 종료: 누적 {self.rows_written}행, {self.batches}회 커밋")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_rows": self._pending_rows,
+            "pending_users": len(self._user_writes),
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "fallback_flushes": self.fallback_flushes,
+            "largest_batch": self.largest_batch,
+            "avg_batch_rows": round(self.rows_written / self.batches, 1) if self.batches else 0,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            "batch_window_ms": self.batch_window * 1000,
+            "max_batch_rows": self.max_batch_rows,
+        }
@@ -0,0 +1,216 @@
+# 데이터베이스 설정 및 모델 - backend/database.py
+# API 서버는 비동기 세션(AsyncSession)을, 업로드 스크립트 등 동기 코드는 기존 SessionLocal 을 사용합니다.
+from sqlalchemy import create_engine, MetaData, Column, Integer, String, DateTime, Text, ForeignKey, LargeBinary, UniqueConstraint, Index, event
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.engine import Engine
+from datetime import datetime
+from typing import AsyncIterator
+import os
+import time
+from dotenv import load_dotenv
+
+from metrics import DB_QUERY_SECONDS
+from storage_profiles import DEFAULT_STORAGE_PROFILE, StorageProfile, apply_sqlite_pragmas, engine_options, get_storage_profile
+
+# 환경변수 로드
+load_dotenv()
+
+# 데이터베이스 URL (환경변수로 관리)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chatgpt_math_tutor.db")
+
+def to_async_database_url(url: str) -> str:
+    """동기 드라이버 URL 을 비동기 드라이버 URL 로 변환 (SQLite → aiosqlite, PostgreSQL → asyncpg)"""
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_database_url(DATABASE_URL))
+
+# 저장소 성능 프로필 (SQLite PRAGMA, PostgreSQL 연결 풀/문장 캐시) - storage_profiles.py 참고
+STORAGE_PROFILE = get_storage_profile(os.getenv("DB_PROFILE", DEFAULT_STORAGE_PROFILE))
+
+def enable_sqlite_foreign_keys(target_engine: Engine):
+    """SQLite 는 연결마다 외래 키 검사를 켜야 ON DELETE CASCADE 가 동작합니다"""
+    if target_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# 레이블 수가 늘어나지 않도록 이 목록에 없는 문장은 OTHER 로 묶습니다
+DB_QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA"}
+
+def record_query_timing(target_engine: Engine):
+    """쿼리 실행 시간을 db_query_duration_seconds 히스토그램에 기록 (/metrics)"""
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = (statement.lstrip()[:7].split() or [""])[0].upper()
+        if operation not in DB_QUERY_OPERATIONS:
+            operation = "OTHER"
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+    # 실패한 쿼리는 after_cursor_execute 가 호출되지 않으므로 시작 시각을 버립니다
+    # (연결 하나는 한 번에 쿼리 하나만 실행하므로 남은 시각을 모두 비워도 됩니다)
+    @event.listens_for(target_engine, "handle_error")
+    def discard_query_timer(exception_context):
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("query_started", None)
+
+def create_app_engine(url: str, profile: StorageProfile) -> Engine:
+    """프로필을 적용한 동기 엔진 (업로드 스크립트 등)"""
+    target_engine = create_engine(url, **engine_options(url, profile))
+    enable_sqlite_foreign_keys(target_engine)
+    apply_sqlite_pragmas(target_engine, profile)
+    record_query_timing(target_engine)
+    return target_engine
+
+def create_app_async_engine(url: str, profile: StorageProfile):
+    """프로필을 적용한 비동기 엔진 (API 엔드포인트)"""
+    target_engine = create_async_engine(url, **engine_options(url, profile, is_async=True))
+    enable_sqlite_foreign_keys(target_engine.sync_engine)
+    apply_sqlite_pragmas(target_engine.sync_engine, profile)
+    record_query_timing(target_engine.sync_engine)
+    return target_engine
+
+# 데이터베이스 스키마 설계 (SQLite와 SQLAlchemy 사용)
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+engine = create_app_engine(SQLALCHEMY_DATABASE_URL, STORAGE_PROFILE)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 비동기 엔진/세션 (이벤트 루프를 막지 않도록 API 엔드포인트에서 사용)
+async_engine = create_app_async_engine(ASYNC_DATABASE_URL, STORAGE_PROFILE)
+# 커밋 후에도 응답을 만들 때 속성을 읽을 수 있도록 만료시키지 않습니다 (비동기 세션에서는 지연 로딩 불가)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# 마이그레이션에서 제약 조건을 이름으로 찾을 수 있도록 외래 키 이름 규칙을 정합니다
+Base = declarative_base(metadata=MetaData(naming_convention={
+    "ix": "ix_%(column_0_label)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}))
+
+# 사용자 모델 및 테이블 생성
+class User(Base):
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, unique=True, index=True)
+    email = Column(String, unique=True, index=True)
+    hashed_password = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # 관계 설정
+    chat_sessions = relationship("ChatSession", back_populates="user", passive_deletes=True)
+
+# 수능 기출문제 모델 추가
+class ExamQuestion(Base):
+    __tablename__ = "exam_questions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    question_number = Column(Integer, unique=True, index=True)  # 1-30
+    question_text = Column(Text)  # 문제 설명
+    question_image = Column(LargeBinary)  # 이미지 데이터 (Base64)
+    difficulty = Column(Integer)  # 난이도 (1-5)
+    topic = Column(String)  # 주제 (대수, 기하, 확률 등)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# 수능 문제 이미지 변형본 모델 (업로드 시 미리 만든 축소/WebP 이미지)
+class ExamQuestionImage(Base):
+    __tablename__ = "exam_question_images"
+    __table_args__ = (UniqueConstraint("question_number", "variant"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_number = Column(Integer, index=True)  # exam_questions.question_number
+    variant = Column(String)  # thumb, small, medium, webp
+    content_type = Column(String)
+    width = Column(Integer)
+    height = Column(Integer)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# 대화 기록 모델
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+    # 최근 세션 조회와 채팅 기록 페이지네이션이 user_id 로 거르고 created_at 으로 정렬합니다
+    __table_args__ = (Index("ix_chat_sessions_user_id_created_at", "user_id", "created_at"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # 누적 대화 요약 (CHAT_CONTEXT_MODE=summary), summary_until_id 까지의 메시지를 요약한 내용
+    summary = Column(Text, nullable=True)
+    summary_until_id = Column(Integer, nullable=True)
+    summary_updated_at = Column(DateTime, nullable=True)
+    
+    user = relationship("User", back_populates="chat_sessions")
+    messages = relationship("ChatMessage", back_populates="session", passive_deletes=True)
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    # 대화 맥락/기록 조회가 session_id 로 거르고 timestamp 로 정렬합니다
+    __table_args__ = (Index("ix_chat_messages_session_id_timestamp", "session_id", "timestamp"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"))
+    role = Column(String)  # "user" 또는 "assistant"
+    content = Column(Text)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    
+    session = relationship("ChatSession", back_populates="messages")
+
+# 데이터 변경 버전 모델 (메모리에 올려둔 데이터의 재로드 여부 판단용)
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+EXAM_QUESTIONS_VERSION_KEY = "exam_questions"
+
+def bump_data_version(db: Session, name: str):
+    """데이터를 바꾼 쪽에서 호출해 버전을 올립니다 (호출한 쪽에서 커밋)"""
+    data_version = db.get(DataVersion, name)
+    if data_version is None:
+        db.add(DataVersion(name=name, version=1))
+    else:
+        data_version.version = (data_version.version or 0) + 1
+
+# 스키마 마이그레이션 (backend/migrations, Alembic)
+ALEMBIC_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+def upgrade_database(url: str = DATABASE_URL):
+    """스키마를 최신 마이그레이션까지 올립니다 (create_all 로 만든 기존 DB 도 그대로 이어서 적용)"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_CONFIG_PATH)
+    config.set_main_option("sqlalchemy.url", url)
+    # 앱 로그 설정을 alembic.ini 의 로그 설정으로 덮어쓰지 않도록 합니다
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+# 동기 데이터베이스 세션 의존성 (스크립트/동기 코드용)
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 비동기 데이터베이스 세션 의존성
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
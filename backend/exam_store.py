@@ -0,0 +1,240 @@
+# 수능 문제 메모리 저장소 - backend/exam_store.py
+# 30개 남짓한 문제를 시작 시 메모리에 올려두고, 응답 본문과 이미지 ETag 까지 미리 만들어 DB 조회 없이 응답합니다.
+import hashlib
+import io
+import logging
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import DataVersion, ExamQuestion, ExamQuestionImage, EXAM_QUESTIONS_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+# 업로드 시 미리 만들어 두는 WebP 변형본 (이름 → 최대 가로 픽셀, None 이면 원본 해상도)
+IMAGE_VARIANT_WIDTHS: Dict[str, Optional[int]] = {
+    "thumb": 320,
+    "small": 720,
+    "medium": 1280,
+    "webp": None,
+}
+IMAGE_VARIANT_WEBP_QUALITY = 80
+ORIGINAL_VARIANT = "original"
+SAVE_DATA_VARIANT = "small"
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    """문제 이미지 변형본 한 개 (원본 포함)"""
+    name: str
+    content_type: str
+    width: int
+    height: int
+    data: bytes
+    etag: str  # 내용 해시 기반 ETag (따옴표 포함)
+
+
+@dataclass(frozen=True)
+class ExamQuestionEntry:
+    """미리 계산된 수능 문제 한 개 (읽기 전용)"""
+    question_number: int
+    question_text: str
+    difficulty: int
+    topic: str
+    image: Optional[bytes]
+    image_content_type: Optional[str]
+    image_etag: Optional[str]  # 이미지 내용 해시 기반 ETag (따옴표 포함)
+    variants: Tuple[ImageVariant, ...] = ()  # 원본 + 변형본, 가로 크기 오름차순
+    body: bytes = b""  # 직렬화된 JSON 응답 본문
+
+
+def detect_image_content_type(data: bytes) -> str:
+    """매직 바이트로 이미지 형식 판별"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def make_etag(data: bytes) -> str:
+    """내용 해시 기반 ETag"""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def read_image_size(data: bytes) -> Tuple[int, int]:
+    """이미지 헤더만 읽어 (가로, 세로) 반환 (읽을 수 없으면 (0, 0))"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+    except Exception:
+        return 0, 0
+
+
+def generate_image_derivatives(image_data: bytes) -> List[Dict]:
+    """원본 이미지로 축소/WebP 변형본 생성 (업로드 시 한 번만 호출)
+
+    원본보다 큰 변형본은 만들지 않으므로 작은 이미지는 "webp" 하나만 생깁니다.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(image_data)) as opened:
+        source = ImageOps.exif_transpose(opened)
+        if source.mode not in ("RGB", "RGBA", "L"):
+            source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+        derivatives = []
+        for name, max_width in IMAGE_VARIANT_WIDTHS.items():
+            image = source
+            if max_width is not None:
+                if source.width <= max_width:
+                    continue
+                height = max(1, round(source.height * max_width / source.width))
+                image = source.resize((max_width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=IMAGE_VARIANT_WEBP_QUALITY, method=4)
+            derivatives.append({
+                "variant": name,
+                "content_type": "image/webp",
+                "width": image.width,
+                "height": image.height,
+                "data": buffer.getvalue(),
+            })
+        return derivatives
+
+
+def select_image_variant(entry: ExamQuestionEntry, variant: Optional[str] = None,
+                         width: Optional[int] = None, accept_webp: bool = False,
+                         save_data: bool = False) -> Optional[ImageVariant]:
+    """요청 조건에 맞는 이미지 변형본 선택
+
+    variant 를 지정하면 그대로 돌려주고, 아니면 WebP 를 받는 클라이언트에게
+    원하는 가로 크기(width) 이상인 가장 작은 변형본을 고릅니다. Save-Data 요청은 "small" 크기까지로 제한합니다.
+    """
+    if not entry.variants:
+        return None
+    by_name = {item.name: item for item in entry.variants}
+    if variant:
+        return by_name.get(variant)
+
+    original = by_name[ORIGINAL_VARIANT]
+    candidates = [item for item in entry.variants if item.name != ORIGINAL_VARIANT]
+    if not accept_webp or not candidates:
+        return original
+
+    if save_data:
+        limit = IMAGE_VARIANT_WIDTHS[SAVE_DATA_VARIANT]
+        width = min(width, limit) if width else limit
+
+    if width:
+        for item in candidates:
+            if item.width >= width and item.width < original.width:
+                return item
+    # 크기 요구가 없거나 모든 변형본보다 크면 원본 해상도 WebP 를 쓰되, 원본보다 커지면 원본을 보냅니다
+    largest = candidates[-1]
+    if largest.width < original.width or len(largest.data) < len(original.data):
+        return largest
+    return original
+
+
+class ExamQuestionStore:
+    """문제 번호 → 미리 계산된 문제 항목을 담은 읽기 전용 저장소
+
+    exam_questions 테이블이 바뀌면 data_versions 의 버전이 올라가고,
+    refresh_if_changed() 가 이를 감지해 새 스냅샷을 만든 뒤 한 번에 교체합니다.
+    """
+
+    def __init__(self, serialize: Callable[[ExamQuestionEntry], bytes]):
+        self._serialize = serialize
+        self._entries: Mapping[int, ExamQuestionEntry] = MappingProxyType({})
+        self.version: Optional[int] = None
+        self.loads = 0
+
+    def get(self, question_number: int) -> Optional[ExamQuestionEntry]:
+        return self._entries.get(question_number)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def current_version(self, db: AsyncSession) -> int:
+        result = await db.execute(
+            select(DataVersion.version).where(DataVersion.name == EXAM_QUESTIONS_VERSION_KEY)
+        )
+        return result.scalar() or 0
+
+    async def load(self, db: AsyncSession):
+        """DB 에서 전체 문제와 이미지 변형본을 읽어 새 스냅샷으로 교체"""
+        version = await self.current_version(db)
+        result = await db.execute(select(ExamQuestion).order_by(ExamQuestion.question_number))
+        questions = result.scalars().all()
+
+        derivatives: Dict[int, List[ImageVariant]] = {}
+        result = await db.execute(select(ExamQuestionImage))
+        for row in result.scalars().all():
+            derivatives.setdefault(row.question_number, []).append(ImageVariant(
+                name=row.variant,
+                content_type=row.content_type,
+                width=row.width,
+                height=row.height,
+                data=row.data,
+                etag=make_etag(row.data),
+            ))
+
+        entries = {}
+        for question in questions:
+            image = question.question_image or None
+            variants: List[ImageVariant] = []
+            if image:
+                width, height = read_image_size(image)
+                variants.append(ImageVariant(
+                    name=ORIGINAL_VARIANT,
+                    content_type=detect_image_content_type(image),
+                    width=width,
+                    height=height,
+                    data=image,
+                    etag=make_etag(image),
+                ))
+                variants.extend(derivatives.get(question.question_number, []))
+                variants.sort(key=lambda item: (item.width, item.name == ORIGINAL_VARIANT))
+
+            entry = ExamQuestionEntry(
+                question_number=question.question_number,
+                question_text=question.question_text or "",
+                difficulty=question.difficulty or 0,
+                topic=question.topic or "",
+                image=image,
+                image_content_type=detect_image_content_type(image) if image else None,
+                image_etag=make_etag(image) if image else None,
+                variants=tuple(variants),
+            )
+            entries[entry.question_number] = replace(entry, body=self._serialize(entry))
+
+        # 참조 교체 한 번으로 바꾸므로 요청 처리 중에도 이전/새 스냅샷 중 하나만 보입니다
+        self._entries = MappingProxyType(entries)
+        self.version = version
+        self.loads += 1
+        logger.info(f"수능 문제 저장소 로드: {len(entries)}개 (버전 {version})")
+
+    async def refresh_if_changed(self, db: AsyncSession) -> bool:
+        """버전이 바뀐 경우에만 다시 로드"""
+        if await self.current_version(db) == self.version:
+            return False
+        await self.load(db)
+        return True
+
+    def stats(self):
+        return {
+            "questions": len(self._entries),
+            "image_variants": sum(len(entry.variants) for entry in self._entries.values()),
+            "version": self.version,
+            "loads": self.loads,
+        }
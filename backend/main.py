@@ -1,26 +1,47 @@
 # AI 수학 튜터 백엔드 - backend/main.py (수정된 버전)
 # 필요한 라이브러리들을 가져옵니다
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, LargeBinary
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import httpx
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Dict, Optional
 import os
 from dotenv import load_dotenv
 import base64
+import hashlib
+import asyncio
+import contextlib
+import json
+import time
+import math
+from concurrent.futures import ThreadPoolExecutor
 
 # OCR 관련 import 추가
-import easyocr
-from PIL import Image
-import io
+from ocr_worker import OCRPool, OCRBatcher, PreprocessOptions
+from caches import LRUTTLCache, OCRResultCache, ConversationCache, ChatResponseCache
+from upstream import UpstreamClient
+from resilience import CIRCUIT_OPEN, AdaptiveConcurrencyLimiter, CircuitOpenError, UpstreamOverloadedError
+from rate_limit import TokenBucketLimiter, retry_after_header
+from chat_writer import ChatMessageWriter
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, OCR_SECONDS, REGISTRY, MetricsMiddleware, record_usage
+from chat_context import ConversationSummarizer, CONTEXT_MODE_SUMMARY, build_prompt
+from database import (
+    SessionLocal, AsyncSessionLocal, async_engine,
+    User, ExamQuestion, ChatSession, ChatMessage, get_async_db,
+    upgrade_database, bump_data_version, EXAM_QUESTIONS_VERSION_KEY, STORAGE_PROFILE
+)
+from exam_store import ExamQuestionStore, ExamQuestionEntry, select_image_variant
+from queries import (
+    user_by_username_query, user_by_email_query, latest_chat_session_query, recent_chat_messages_query,
+    owned_chat_session_query, chat_history_page_query, chat_messages_page_query
+)
 
 # 환경변수 로드
 load_dotenv()
@@ -30,11 +51,45 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change_this_to_a_secure_random_string")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# 비밀번호 해싱 설정 (bcrypt 작업 계수, 해싱 전용 스레드 수)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_THREADS = int(os.getenv("PASSWORD_HASH_THREADS", "4"))
+
+# 인증 캐시 설정 (검증된 토큰 → 사용자명, 사용자명 → 사용자 레코드)
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+
 # 부트캠프 API 엔드포인트 URL (환경변수로 관리)
 BOOTCAMP_API_URL = os.getenv("BOOTCAMP_API_URL", "https://dev.wenivops.co.kr/services/openai-api")
 
-# 데이터베이스 URL (환경변수로 관리)
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chatgpt_math_tutor.db")
+# 업스트림 연결 풀 설정 (앱 수명 동안 하나의 클라이언트 공유)
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30"))
+# 동시에 진행 중인 같은 요청 본문은 하나의 업스트림 호출로 합침 (single-flight)
+UPSTREAM_COALESCE = os.getenv("UPSTREAM_COALESCE", "true").lower() == "true"
+# 연결 실패/429/502/503/504 재시도 (지터가 들어간 지수 백오프)
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.2"))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "2"))
+# 최근 p95 지연이 지나도 응답이 없으면 같은 요청을 하나 더 보냄 (업스트림 사용량이 늘어나므로 기본 꺼짐)
+UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "false").lower() == "true"
+UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", "0.5"))
+UPSTREAM_HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "20"))
+# 연속 실패가 쌓이면 일정 시간 업스트림 호출 없이 바로 실패 (서킷 브레이커)
+UPSTREAM_BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+# 업스트림 동시 호출 한도 (지연이 목표를 넘거나 과부하 응답이면 줄이고, 빠르면 늘리는 AIMD)
+UPSTREAM_LIMIT_ENABLED = os.getenv("UPSTREAM_LIMIT_ENABLED", "true").lower() == "true"
+UPSTREAM_LIMIT_INITIAL = int(os.getenv("UPSTREAM_LIMIT_INITIAL", "20"))
+UPSTREAM_LIMIT_MIN = int(os.getenv("UPSTREAM_LIMIT_MIN", "2"))
+UPSTREAM_LIMIT_MAX = int(os.getenv("UPSTREAM_LIMIT_MAX", str(UPSTREAM_MAX_CONNECTIONS)))
+UPSTREAM_LIMIT_LATENCY_TARGET = float(os.getenv("UPSTREAM_LIMIT_LATENCY_TARGET", "10"))
+UPSTREAM_LIMIT_QUEUE_SIZE = int(os.getenv("UPSTREAM_LIMIT_QUEUE_SIZE", "50"))
+UPSTREAM_LIMIT_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_LIMIT_QUEUE_TIMEOUT", "3"))
 
 # CORS 설정 (환경변수로 관리)
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
@@ -43,6 +98,79 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
 
+# OCR 워커 프로세스 설정
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "1"))
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "1"))
+OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "ko,en").split(",")
+OCR_GPU = os.getenv("OCR_GPU", "false").lower() == "true"
+# /ready 가 OCR 초기화 실패도 503 으로 보고할지 (기본은 모델 로드 중에만 503, 실패해도 텍스트 채팅은 가능)
+READY_REQUIRES_OCR = os.getenv("READY_REQUIRES_OCR", "false").lower() == "true"
+
+# OCR 마이크로 배치 설정 (기본 0 = 배치하지 않음, 켜도 모든 워커가 바쁠 때만 요청을 모음)
+OCR_BATCH_WINDOW_MS = float(os.getenv("OCR_BATCH_WINDOW_MS", "0"))
+OCR_BATCH_MAX_SIZE = int(os.getenv("OCR_BATCH_MAX_SIZE", "8"))
+
+# OCR 이미지 전처리 설정
+OCR_MAX_IMAGE_BYTES = int(os.getenv("OCR_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+OCR_PREPROCESS = PreprocessOptions(
+    max_long_edge=int(os.getenv("OCR_MAX_LONG_EDGE", "1600")),
+    max_pixels=int(os.getenv("OCR_MAX_PIXELS", "40000000")),
+    grayscale=os.getenv("OCR_GRAYSCALE", "true").lower() == "true",
+    trim_margins=os.getenv("OCR_TRIM_MARGINS", "false").lower() == "true"
+)
+
+# OCR 결과 캐시 설정 (메모리 LRU + SQLite 테이블)
+OCR_CACHE_DB_PATH = os.getenv("OCR_CACHE_DB_PATH", "./ocr_cache.db")
+OCR_CACHE_MEMORY_ENTRIES = int(os.getenv("OCR_CACHE_MEMORY_ENTRIES", "256"))
+OCR_CACHE_MEMORY_TTL_SECONDS = int(os.getenv("OCR_CACHE_MEMORY_TTL_SECONDS", "3600"))
+OCR_CACHE_DISK_ENTRIES = int(os.getenv("OCR_CACHE_DISK_ENTRIES", "10000"))
+OCR_CACHE_DISK_TTL_SECONDS = int(os.getenv("OCR_CACHE_DISK_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# 대화 맥락 캐시 설정 (프롬프트에 넣는 최근 메시지 수, 캐시할 세션 수와 전체 메시지 크기 한도)
+CHAT_CONTEXT_MESSAGES = int(os.getenv("CHAT_CONTEXT_MESSAGES", "10"))
+CHAT_CONTEXT_CACHE_SESSIONS = int(os.getenv("CHAT_CONTEXT_CACHE_SESSIONS", "10000"))
+CHAT_CONTEXT_CACHE_MAX_BYTES = int(os.getenv("CHAT_CONTEXT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# 업스트림 프롬프트 구성 (recent: 최근 대화만, summary: 누적 요약 + 최근 대화)
+# 이전 대화는 추정 토큰 예산 안에서 최신 메시지부터 넣습니다
+CHAT_CONTEXT_MODE = os.getenv("CHAT_CONTEXT_MODE", "recent").lower()
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "3000"))
+# 요약 모드: 최근 몇 턴은 원문으로 남기고, 요약 이후 몇 턴이 더 쌓이면 백그라운드에서 요약 갱신
+CHAT_SUMMARY_KEEP_TURNS = int(os.getenv("CHAT_SUMMARY_KEEP_TURNS", "2"))
+CHAT_SUMMARY_EVERY_TURNS = int(os.getenv("CHAT_SUMMARY_EVERY_TURNS", "3"))
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "600"))
+
+# 첫 질문 응답 캐시 (이전 대화가 없는 같은 질문이면 업스트림을 다시 호출하지 않음, 기본 비활성)
+CHAT_RESPONSE_CACHE_ENABLED = os.getenv("CHAT_RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+CHAT_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+CHAT_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("CHAT_RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# 사용자별 채팅 요청 빈도 제한 (토큰 버킷: 분당 충전 개수, 연속 허용 개수), 이미지 채팅은 OCR 비용 때문에 따로 제한
+# 분당 개수를 0 으로 두면 해당 채팅을 끕니다 (403)
+CHAT_RATE_LIMIT_ENABLED = os.getenv("CHAT_RATE_LIMIT_ENABLED", "true").lower() == "true"
+CHAT_TEXT_RATE_PER_MINUTE = float(os.getenv("CHAT_TEXT_RATE_PER_MINUTE", "20"))
+CHAT_TEXT_BURST = int(os.getenv("CHAT_TEXT_BURST", "5"))
+CHAT_IMAGE_RATE_PER_MINUTE = float(os.getenv("CHAT_IMAGE_RATE_PER_MINUTE", "4"))
+CHAT_IMAGE_BURST = int(os.getenv("CHAT_IMAGE_BURST", "2"))
+CHAT_RATE_LIMIT_MAX_USERS = int(os.getenv("CHAT_RATE_LIMIT_MAX_USERS", "10000"))
+
+# 채팅 메시지 지연 일괄 저장 (응답 전에 커밋하지 않고 여러 요청의 메시지를 모아 한 트랜잭션으로 저장, 기본 비활성)
+CHAT_WRITE_BEHIND_ENABLED = os.getenv("CHAT_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+CHAT_WRITE_BEHIND_WINDOW_MS = float(os.getenv("CHAT_WRITE_BEHIND_WINDOW_MS", "20"))
+CHAT_WRITE_BEHIND_MAX_ROWS = int(os.getenv("CHAT_WRITE_BEHIND_MAX_ROWS", "200"))
+
+# 서버 시작 시 스키마 마이그레이션 적용 여부 (워커를 여러 개 띄우는 배포에서는 끄고 배포 단계에서 alembic upgrade head 실행)
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# 채팅 기록 페이지 크기 (세션 수, 세션별 최근 메시지 수의 기본값과 최대값)
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "20"))
+CHAT_HISTORY_MAX_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", "100"))
+CHAT_HISTORY_MESSAGES_PER_SESSION = int(os.getenv("CHAT_HISTORY_MESSAGES_PER_SESSION", "50"))
+CHAT_HISTORY_MAX_MESSAGES_PER_SESSION = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES_PER_SESSION", "200"))
+
+# 수능 문제 저장소 변경 확인 주기 (초)
+EXAM_STORE_POLL_SECONDS = float(os.getenv("EXAM_STORE_POLL_SECONDS", "30"))
+
 # 로그 레벨 설정
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -57,8 +185,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# OCR 리더 전역 변수
-ocr_reader = None
+# OCR 워커 풀 전역 변수 (모델 로드는 시작 이벤트에서 백그라운드로 진행)
+ocr_pool = OCRPool(
+    workers=OCR_WORKERS,
+    languages=OCR_LANGUAGES,
+    gpu=OCR_GPU,
+    torch_threads=OCR_TORCH_THREADS
+)
+# OCR 결과 캐시 키에 넣는 설정 요약 (모델/언어 또는 전처리 설정이 바뀌면 이전 결과를 쓰지 않음)
+OCR_CACHE_VARIANT = f"{ocr_pool.signature()}:{OCR_PREPROCESS.signature()}"
+ocr_init_task: Optional[asyncio.Task] = None
+exam_store_task: Optional[asyncio.Task] = None
+
+# 동시에 들어온 이미지 요청을 모아서 한 번에 추론합니다
+ocr_batcher = OCRBatcher(ocr_pool, window_ms=OCR_BATCH_WINDOW_MS, max_batch_size=OCR_BATCH_MAX_SIZE)
+
+# 같은 이미지를 다시 OCR 하지 않도록 결과를 캐시합니다
+ocr_cache = OCRResultCache(
+    db_path=OCR_CACHE_DB_PATH,
+    memory_entries=OCR_CACHE_MEMORY_ENTRIES,
+    memory_ttl_seconds=OCR_CACHE_MEMORY_TTL_SECONDS,
+    disk_entries=OCR_CACHE_DISK_ENTRIES,
+    disk_ttl_seconds=OCR_CACHE_DISK_TTL_SECONDS
+)
+
+# 업스트림 AI API 공유 클라이언트
+upstream = UpstreamClient(
+    BOOTCAMP_API_URL,
+    max_connections=UPSTREAM_MAX_CONNECTIONS,
+    max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+    keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+    http2=UPSTREAM_HTTP2,
+    connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=UPSTREAM_READ_TIMEOUT,
+    coalesce=UPSTREAM_COALESCE,
+    max_retries=UPSTREAM_MAX_RETRIES,
+    retry_base_delay=UPSTREAM_RETRY_BASE_DELAY,
+    retry_max_delay=UPSTREAM_RETRY_MAX_DELAY,
+    hedge=UPSTREAM_HEDGE_ENABLED,
+    hedge_min_delay=UPSTREAM_HEDGE_MIN_DELAY,
+    hedge_min_samples=UPSTREAM_HEDGE_MIN_SAMPLES,
+    breaker_failure_threshold=UPSTREAM_BREAKER_FAILURES,
+    breaker_reset_timeout=UPSTREAM_BREAKER_RESET_SECONDS,
+    limiter=AdaptiveConcurrencyLimiter(
+        initial_limit=UPSTREAM_LIMIT_INITIAL,
+        min_limit=UPSTREAM_LIMIT_MIN,
+        max_limit=UPSTREAM_LIMIT_MAX,
+        latency_target=UPSTREAM_LIMIT_LATENCY_TARGET,
+        max_queue=UPSTREAM_LIMIT_QUEUE_SIZE,
+        queue_timeout=UPSTREAM_LIMIT_QUEUE_TIMEOUT
+    ) if UPSTREAM_LIMIT_ENABLED else None
+)
 
 # FastAPI 애플리케이션 인스턴스 생성
 app = FastAPI(title="AI 수학 튜터 API 서버", version="1.0.0")
@@ -66,10 +243,36 @@ app = FastAPI(title="AI 수학 튜터 API 서버", version="1.0.0")
 # FastAPI 시작 이벤트에 OCR 초기화 추가
 @app.on_event("startup")
 async def startup_event():
-    logger.info("서버 시작 이벤트: OCR 초기화...")
-    initialize_ocr()
-    # 수능 문제 초기 데이터 로드
+    global ocr_init_task, exam_store_task
+    # 데이터베이스 스키마 마이그레이션 적용 (모듈 import 만으로는 스키마를 바꾸지 않습니다)
+    if DB_MIGRATE_ON_STARTUP:
+        upgrade_database()
+    logger.info("서버 시작 이벤트: OCR 백그라운드 초기화 시작...")
+    # 모델 로드를 기다리지 않고 바로 요청을 받습니다 (텍스트 채팅은 즉시 가능)
+    ocr_init_task = asyncio.create_task(initialize_ocr())
+    upstream.start()
+    if chat_message_writer:
+        chat_message_writer.start()
+    # 수능 문제 초기 데이터 로드 후 메모리 저장소에 올리기
     initialize_exam_questions()
+    await load_exam_store()
+    exam_store_task = asyncio.create_task(watch_exam_store())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("서버 종료 이벤트: OCR 워커, 업스트림/DB 연결 종료...")
+    if exam_store_task:
+        exam_store_task.cancel()
+    ocr_pool.shutdown()
+    # 아직 저장하지 않은 채팅 메시지를 먼저 모두 저장합니다
+    if chat_message_writer:
+        await chat_message_writer.close()
+    if conversation_summarizer:
+        await conversation_summarizer.close()
+    await upstream.close()
+    await async_engine.dispose()
+    password_hash_executor.shutdown(wait=False)
+    ocr_cache.close()
 
 # CORS 설정 (프론트엔드와 통신을 위해, 환경변수 반영)
 app.add_middleware(
@@ -80,70 +283,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 데이터베이스 스키마 설계 (SQLite와 SQLAlchemy 사용)
-SQLALCHEMY_DATABASE_URL = DATABASE_URL
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# 라우트별 요청 시간 히스토그램 (/metrics) - 가장 바깥에서 CORS 처리까지 포함해 잽니다
+app.add_middleware(MetricsMiddleware)
 
 # 비밀번호 해싱
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 최소/최대 라운드를 같은 값으로 두어 설정값과 다른 라운드의 해시는 로그인 시 재해싱 대상이 됩니다
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+# bcrypt 는 CPU 를 오래 사용하므로 이벤트 루프가 아닌 제한된 스레드 풀에서 실행합니다
+password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_THREADS, thread_name_prefix="bcrypt")
 
 # 인증 스키마
 security = HTTPBearer()
 
-# 사용자 모델 및 테이블 생성
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
-    email = Column(String, unique=True, index=True)
-    hashed_password = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    # 관계 설정
-    chat_sessions = relationship("ChatSession", back_populates="user")
+# 반복 요청마다 JWT 디코딩과 사용자 조회를 하지 않도록 결과를 캐시합니다
+auth_token_cache = LRUTTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+auth_user_cache = LRUTTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
 
-# 수능 기출문제 모델 추가
-class ExamQuestion(Base):
-    __tablename__ = "exam_questions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    question_number = Column(Integer, unique=True, index=True)  # 1-30
-    question_text = Column(Text)  # 문제 설명
-    question_image = Column(LargeBinary)  # 이미지 데이터 (Base64)
-    difficulty = Column(Integer)  # 난이도 (1-5)
-    topic = Column(String)  # 주제 (대수, 기하, 확률 등)
-    created_at = Column(DateTime, default=datetime.utcnow)
+# 채팅 턴마다 최근 세션과 이전 메시지를 DB 에서 다시 읽지 않도록 세션별 최근 메시지를 메모리에 유지합니다
+conversation_cache = ConversationCache(CHAT_CONTEXT_MESSAGES, CHAT_CONTEXT_CACHE_SESSIONS, CHAT_CONTEXT_CACHE_MAX_BYTES)
 
-# 대화 기록 모델
-class ChatSession(Base):
-    __tablename__ = "chat_sessions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    user = relationship("User", back_populates="chat_sessions")
-    messages = relationship("ChatMessage", back_populates="session")
+# 첫 질문 응답 캐시 (CHAT_RESPONSE_CACHE_ENABLED=true 일 때만 사용)
+chat_response_cache = ChatResponseCache(
+    CHAT_RESPONSE_CACHE_MAX_ENTRIES, CHAT_RESPONSE_CACHE_TTL_SECONDS
+) if CHAT_RESPONSE_CACHE_ENABLED else None
 
-class ChatMessage(Base):
-    __tablename__ = "chat_messages"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("chat_sessions.id"))
-    role = Column(String)  # "user" 또는 "assistant"
-    content = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    
-    session = relationship("ChatSession", back_populates="messages")
+# 사용자별 채팅 빈도 제한 (텍스트/이미지 채팅 각각의 토큰 버킷)
+chat_rate_limiters = {
+    "text": TokenBucketLimiter(CHAT_TEXT_RATE_PER_MINUTE, CHAT_TEXT_BURST, CHAT_RATE_LIMIT_MAX_USERS),
+    "image": TokenBucketLimiter(CHAT_IMAGE_RATE_PER_MINUTE, CHAT_IMAGE_BURST, CHAT_RATE_LIMIT_MAX_USERS),
+} if CHAT_RATE_LIMIT_ENABLED else None
+
+# 채팅 메시지 write-behind 큐 (CHAT_WRITE_BEHIND_ENABLED=true 일 때만 사용)
+chat_message_writer = ChatMessageWriter(
+    AsyncSessionLocal, CHAT_WRITE_BEHIND_WINDOW_MS, CHAT_WRITE_BEHIND_MAX_ROWS
+) if CHAT_WRITE_BEHIND_ENABLED else None
 
-# 데이터베이스 테이블 생성
-Base.metadata.create_all(bind=engine)
+# 요약 모드에서만 세션 요약을 백그라운드로 갱신합니다
+conversation_summarizer = ConversationSummarizer(
+    upstream,
+    AsyncSessionLocal,
+    conversation_cache,
+    keep_recent_messages=CHAT_SUMMARY_KEEP_TURNS * 2,
+    trigger_messages=(CHAT_SUMMARY_KEEP_TURNS + CHAT_SUMMARY_EVERY_TURNS) * 2,
+    max_summary_chars=CHAT_SUMMARY_MAX_CHARS
+) if CHAT_CONTEXT_MODE == CONTEXT_MODE_SUMMARY else None
 
 # 수능 문제 초기 데이터 로드 함수
 def initialize_exam_questions():
@@ -199,6 +389,7 @@ def initialize_exam_questions():
             )
             db.add(question)
         
+        bump_data_version(db, EXAM_QUESTIONS_VERSION_KEY)
         db.commit()
         logger.info("수능 기출문제 30개 초기 데이터 생성 완료")
         
@@ -208,63 +399,145 @@ def initialize_exam_questions():
     finally:
         db.close()
 
+# 수능 문제 메모리 저장소 관련 함수들
+def serialize_exam_question(entry: ExamQuestionEntry) -> bytes:
+    """문제 응답 JSON 본문을 미리 만들어 둡니다"""
+    return ExamQuestionResponse(
+        question_number=entry.question_number,
+        question_text=entry.question_text,
+        question_image_url=exam_image_url(entry),
+        difficulty=entry.difficulty,
+        topic=entry.topic
+    ).model_dump_json().encode("utf-8")
+
+def exam_image_version(entry: ExamQuestionEntry) -> str:
+    """원본과 변형본 내용 해시를 합친 이미지 버전 (변형본만 다시 만들어도 바뀜)"""
+    if len(entry.variants) <= 1:
+        return entry.image_etag.strip('"')
+    combined = "".join(variant.etag for variant in entry.variants)
+    return hashlib.sha256(combined.encode("ascii")).hexdigest()[:32]
+
+def exam_image_url(entry: ExamQuestionEntry) -> Optional[str]:
+    """이미지 URL (내용 해시를 쿼리에 넣어 이미지가 바뀌면 URL 도 바뀌도록 함)"""
+    if not entry.image:
+        return None
+    return f"/exam-question/{entry.question_number}/image?v={exam_image_version(entry)}"
+
+exam_store = ExamQuestionStore(serialize_exam_question)
+
+async def load_exam_store():
+    """시작 시 전체 문제를 메모리에 로드"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await exam_store.load(db)
+    except Exception as e:
+        logger.error(f"수능 문제 저장소 로드 실패: {e}")
+
+async def watch_exam_store():
+    """주기적으로 버전을 확인해 upload_exam_questions.py 등으로 바뀐 문제를 다시 로드"""
+    while True:
+        await asyncio.sleep(EXAM_STORE_POLL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await exam_store.refresh_if_changed(db)
+        except Exception as e:
+            logger.error(f"수능 문제 저장소 갱신 실패: {e}")
+
 # OCR 관련 함수들
-def initialize_ocr():
-    """OCR 리더 초기화"""
-    global ocr_reader
+async def initialize_ocr():
+    """OCR 워커 풀 초기화 (모델 로드 + 워밍업 추론, 백그라운드 실행)"""
     try:
-        logger.info("OCR 리더 초기화 중...")
-        ocr_reader = easyocr.Reader(['ko', 'en'], gpu=False)
-        logger.info("OCR 리더 초기화 성공")
+        logger.info(f"OCR 워커 풀 초기화 중... (워커 {OCR_WORKERS}개)")
+        if not await ocr_pool.start_in_background():
+            raise RuntimeError("OCR 워커 시작 실패")
+        logger.info("OCR 워커 풀 초기화 및 워밍업 성공")
         return True
     except Exception as e:
-        logger.error(f"OCR 리더 초기화 실패: {e}")
+        logger.error(f"OCR 워커 풀 초기화 실패: {e}")
         logger.warning("이미지 업로드 기능이 제한됩니다.")
-        ocr_reader = None
         return False
 
-def extract_text_from_image(image_data: str) -> str:
-    """Base64 이미지에서 텍스트 추출"""
-    global ocr_reader
-    
-    if not ocr_reader:
-        return "OCR 기능을 사용할 수 없습니다. 텍스트로 문제를 입력해주세요."
+async def extract_text_from_image(image_data: str) -> str:
+    """Base64 이미지에서 텍스트 추출 (OCR 은 워커 프로세스에서 실행, 처리 시간은 ocr_duration_seconds)"""
+    # 디코딩 전에 Base64 길이로 원본 크기를 추정해 너무 큰 업로드를 거절합니다
+    if len(image_data) * 3 // 4 > OCR_MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"이미지 크기가 너무 큽니다 (최대 {OCR_MAX_IMAGE_BYTES // (1024 * 1024)}MB)"
+        )
     
+    started = time.perf_counter()
+    outcome = "error"
     try:
         # Base64 디코딩
         image_bytes = base64.b64decode(image_data)
         
-        # OCR에 바이트 데이터 직접 전달
-        results = ocr_reader.readtext(image_bytes)
-        
-        if not results:
-            return "이미지에서 텍스트를 찾을 수 없습니다. 더 선명한 이미지를 업로드하거나 텍스트로 문제를 입력해주세요."
-        
-        # 신뢰도 순으로 정렬하고 텍스트 추출
-        texts = []
-        for result in results:
-            text = result[1].strip()
-            confidence = result[2]
-            
-            # 신뢰도가 0.3 이상인 텍스트만 사용
-            if confidence > 0.3 and text:
-                texts.append(text)
-        
-        if not texts:
-            return "이미지에서 명확한 텍스트를 찾을 수 없습니다. 더 선명한 이미지를 업로드해주세요."
+        # 같은 이미지는 캐시된 결과를 사용하고 OCR 을 건너뜁니다
+        cache_key = OCRResultCache.make_key(image_bytes, OCR_CACHE_VARIANT)
+        cached_text = await ocr_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info(f"OCR 캐시 적중: {cache_key[:12]}")
+            outcome = "cache_hit"
+            return cached_text
         
-        # 텍스트 합치기 및 정리
-        extracted_text = " ".join(texts)
+        if ocr_pool.warming:
+            # 모델 로드가 끝나기 전에는 기다리게 하지 않고 바로 알려줍니다
+            outcome = "warming"
+            raise HTTPException(
+                status_code=503,
+                detail="OCR 모델을 준비 중입니다 (OCR warming). 잠시 후 다시 시도하거나 텍스트로 문제를 입력해주세요.",
+                headers={"Retry-After": "10"}
+            )
         
-        # 수학 기호 정리
-        extracted_text = clean_math_text(extracted_text)
+        if not ocr_pool.available:
+            outcome = "unavailable"
+            return "OCR 기능을 사용할 수 없습니다. 텍스트로 문제를 입력해주세요."
         
-        logger.info(f"OCR 텍스트 추출 성공: {extracted_text[:50]}...")
+        # OCR 워커 프로세스에 바이트 데이터 전달
+        results, ocr_stats = await ocr_batcher.recognize(image_bytes, OCR_PREPROCESS)
+        logger.info(
+            f"OCR 전처리: {ocr_stats['pixels_before']}px -> {ocr_stats['pixels_after']}px, "
+            f"배치 크기: {ocr_stats.get('batch_size', 1)}, 단계별 시간(ms): {ocr_stats['timings_ms']}"
+        )
+        extracted_text = ocr_results_to_text(results)
+        await ocr_cache.set(cache_key, extracted_text)
+        outcome = "ok"
         return extracted_text
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"OCR 텍스트 추출 실패: {e}")
+        ERRORS.inc(type="ocr_failed")
         return f"이미지 처리 중 오류가 발생했습니다. 텍스트로 문제를 입력해주세요."
+    finally:
+        OCR_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+def ocr_results_to_text(results) -> str:
+    """OCR 결과 (텍스트, 신뢰도) 목록을 정리된 문제 텍스트로 변환"""
+    if not results:
+        return "이미지에서 텍스트를 찾을 수 없습니다. 더 선명한 이미지를 업로드하거나 텍스트로 문제를 입력해주세요."
+    
+    # 신뢰도 순으로 정렬하고 텍스트 추출
+    texts = []
+    for text, confidence in results:
+        text = text.strip()
+        
+        # 신뢰도가 0.3 이상인 텍스트만 사용
+        if confidence > 0.3 and text:
+            texts.append(text)
+    
+    if not texts:
+        return "이미지에서 명확한 텍스트를 찾을 수 없습니다. 더 선명한 이미지를 업로드해주세요."
+    
+    # 텍스트 합치기 및 정리
+    extracted_text = " ".join(texts)
+    
+    # 수학 기호 정리
+    extracted_text = clean_math_text(extracted_text)
+    
+    logger.info(f"OCR 텍스트 추출 성공: {extracted_text[:50]}...")
+    return extracted_text
 
 def clean_math_text(text: str) -> str:
     """수학 텍스트 정리"""
@@ -283,14 +556,6 @@ def clean_math_text(text: str) -> str:
     
     return text.strip()
 
-# 데이터베이스 세션 의존성
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Pydantic 모델들
 class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -319,17 +584,22 @@ class ExamQuestionRequest(BaseModel):
 class ExamQuestionResponse(BaseModel):
     question_number: int
     question_text: str
-    question_image: Optional[str] = None
+    question_image_url: Optional[str] = None
     difficulty: int
     topic: str
     message: str = "문제를 확인하신 후, 어떤 부분부터 시작하면 좋을지 물어보세요!"
 
 # 유틸리티 함수들
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    """비밀번호 검증 후 (일치 여부, 재해싱이 필요하면 새 해시) 반환"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -341,55 +611,139 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    token = credentials.credentials
+    
+    # 이미 검증한 토큰이면 JWT 디코딩을 건너뜁니다 (토큰 만료 시각 이후로는 캐시하지 않음)
+    username = auth_token_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            auth_token_cache.set(token, username, ttl_seconds=expires_in)
     
-    user = db.query(User).filter(User.username == username).first()
+    user = auth_user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        user = await get_user_by_username(db, username)
+        if user is None:
+            raise credentials_exception
+        # 다른 요청에서 재사용하므로 세션에서 분리된 읽기 전용 레코드로 캐시합니다
+        db.expunge(user)
+        auth_user_cache.set(username, user)
     return user
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+def invalidate_cached_user(username: str):
+    """사용자 정보가 바뀌면 캐시된 레코드를 제거합니다"""
+    auth_user_cache.pop(username)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(user_by_username_query(username))
+    return result.scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(user_by_email_query(email))
+    return result.scalars().first()
 
 # API 엔드포인트들
 @app.get("/")
 async def root():
     """서버 상태 확인"""
     logger.info("서버 상태 확인 요청")
-    ocr_status = "사용 가능" if ocr_reader else "사용 불가"
+    if ocr_pool.available:
+        ocr_status = "사용 가능"
+    elif ocr_pool.warming:
+        ocr_status = "준비 중"
+    else:
+        ocr_status = "사용 불가"
     return {
         "message": "AI 수학 튜터 서버가 실행 중입니다",
         "ocr_status": ocr_status
     }
 
+@app.get("/ready")
+async def readiness():
+    """준비 상태 확인 (OCR 모델 로드 중에는 503)
+
+    OCR 초기화가 실패해도 텍스트 채팅은 동작하고 이미지 채팅은 따로 안내하므로 OCR 상태만 본문에 알립니다.
+    READY_REQUIRES_OCR=true 이면 OCR 을 쓸 수 없는 동안 계속 503 입니다.
+    """
+    ready = not ocr_pool.warming and (ocr_pool.available or not READY_REQUIRES_OCR)
+    body = {
+        "ready": ready,
+        "ocr_state": ocr_pool.state,
+        "ocr_available": ocr_pool.available
+    }
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/stats")
+async def get_stats():
+    """캐시 적중률 등 운영 지표 조회"""
+    return {
+        "ocr_cache": ocr_cache.stats(),
+        "ocr_batching": ocr_batcher.stats(),
+        "upstream_pool": upstream.stats(),
+        "auth_token_cache": auth_token_cache.stats(),
+        "auth_user_cache": auth_user_cache.stats(),
+        "conversation_cache": conversation_cache.stats(),
+        "conversation_summary": conversation_summarizer.stats() if conversation_summarizer else None,
+        "chat_response_cache": chat_response_cache.stats() if chat_response_cache else None,
+        "chat_write_behind": chat_message_writer.stats() if chat_message_writer else None,
+        "database": {"profile": STORAGE_PROFILE.name, "pool": async_engine.pool.status()},
+        "chat_rate_limit": {
+            kind: limiter.stats() for kind, limiter in chat_rate_limiters.items()
+        } if chat_rate_limiters else None,
+        "exam_store": exam_store.stats()
+    }
+
+# 수집 시점에 읽는 현재 상태 (요청 경로에는 비용이 없음)
+REGISTRY.gauge("upstream_in_flight", "업스트림에 보낸 뒤 응답을 기다리는 요청 수", lambda: upstream.in_flight)
+REGISTRY.gauge(
+    "upstream_circuit_open", "업스트림 서킷 브레이커가 열려 있으면 1",
+    lambda: 1 if upstream.breaker.state == CIRCUIT_OPEN else 0
+)
+REGISTRY.gauge(
+    "upstream_concurrency_limit", "업스트림 적응형 동시 호출 한도",
+    lambda: upstream.limiter.current_limit if upstream.limiter else None
+)
+REGISTRY.gauge(
+    "upstream_queue_depth", "업스트림 동시 호출 한도 대기열 길이",
+    lambda: upstream.limiter.queue_depth if upstream.limiter else None
+)
+REGISTRY.gauge(
+    "chat_write_behind_pending_rows", "아직 저장하지 않은 채팅 메시지 행 수",
+    lambda: chat_message_writer.stats()["pending_rows"] if chat_message_writer else None
+)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 형식 지표 (요청/OCR/업스트림/DB 지연 히스토그램, 토큰/오류 카운터)"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/register", response_model=Token)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """회원가입 기능을 구현합니다."""
     logger.info(f"회원가입 요청: {user.username}")
     
-    if get_user_by_username(db, user.username):
+    if await get_user_by_username(db, user.username):
         raise HTTPException(status_code=400, detail="이미 존재하는 사용자명입니다")
     
-    if get_user_by_email(db, user.email):
+    if await get_user_by_email(db, user.email):
         raise HTTPException(status_code=400, detail="이미 등록된 이메일입니다")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     
     db_user = User(
         username=user.username,
@@ -398,8 +752,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -410,12 +764,15 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/login", response_model=Token)
-async def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """로그인 기능을 구현합니다."""
     logger.info(f"로그인 요청: {user.username}")
     
-    db_user = get_user_by_username(db, user.username)
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    db_user = await get_user_by_username(db, user.username)
+    is_valid, new_hash = (False, None)
+    if db_user:
+        is_valid, new_hash = await verify_password(user.password, db_user.hashed_password)
+    if not is_valid:
         logger.warning(f"로그인 실패: {user.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -423,6 +780,13 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # bcrypt 작업 계수가 바뀌었다면 로그인 성공 시점에 새 설정으로 재해싱해 저장합니다
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+        invalidate_cached_user(db_user.username)
+        logger.info(f"비밀번호 해시 갱신 (bcrypt rounds={BCRYPT_ROUNDS}): {user.username}")
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -434,64 +798,93 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
 @app.post("/exam-question", response_model=ExamQuestionResponse)
 async def get_exam_question(
     request: ExamQuestionRequest, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
-    """DB에서 수능 기출문제를 조회합니다."""
+    """메모리 저장소에서 수능 기출문제를 조회합니다 (DB 조회 없음)."""
     question_number = request.question_number
     
     logger.info(f"수능 문제 요청: 사용자 {current_user.username}, 문제 {question_number}번")
     
-    # 데이터베이스에서 문제 조회
-    exam_question = db.query(ExamQuestion).filter(
-        ExamQuestion.question_number == question_number
-    ).first()
+    # 미리 직렬화해 둔 응답 본문을 그대로 반환
+    entry = exam_store.get(question_number)
     
-    if not exam_question:
+    if not entry:
         raise HTTPException(status_code=404, detail=f"{question_number}번 문제를 찾을 수 없습니다")
     
-    # 이미지 데이터가 있으면 Base64로 인코딩
-    question_image_base64 = None
-    if exam_question.question_image:
-        question_image_base64 = base64.b64encode(exam_question.question_image).decode('utf-8')
+    return Response(content=entry.body, media_type="application/json")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag 와 일치하는지 확인 (약한 비교)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def parse_header_number(value: Optional[str]) -> Optional[float]:
+    """클라이언트 힌트 헤더 값을 숫자로 변환 (없거나 잘못되면 None)"""
+    try:
+        number = float(value) if value else None
+    except ValueError:
+        return None
+    return number if number and number > 0 else None
+
+def requested_image_width(request: Request, w: Optional[int]) -> Optional[int]:
+    """원하는 이미지 가로 픽셀: ?w= → Sec-CH-Width → Viewport-Width × DPR 순서로 결정"""
+    if w and w > 0:
+        return w
+    headers = request.headers
+    width = parse_header_number(headers.get("sec-ch-width") or headers.get("width"))
+    if width:
+        return int(width)
+    viewport = parse_header_number(headers.get("sec-ch-viewport-width") or headers.get("viewport-width"))
+    if viewport:
+        dpr = parse_header_number(headers.get("sec-ch-dpr") or headers.get("dpr")) or 1.0
+        return int(viewport * dpr)
+    return None
+
+@app.get("/exam-question/{question_number}/image")
+async def get_exam_question_image(question_number: int, request: Request, v: Optional[str] = None,
+                                  variant: Optional[str] = None, w: Optional[int] = None):
+    """수능 문제 이미지 (ETag/If-None-Match 및 장기 캐시 지원)
+    
+    <img> 태그에서 바로 불러올 수 있도록 인증 없이 제공합니다.
+    ?variant= (original, thumb, small, medium, webp) 로 직접 고르거나, ?w= 또는 클라이언트 힌트
+    (Sec-CH-Width, Sec-CH-Viewport-Width, Sec-CH-DPR, Save-Data) 와 Accept 헤더로 알맞은 크기를 고릅니다.
+    """
+    entry = exam_store.get(question_number)
+    if not entry or not entry.image:
+        raise HTTPException(status_code=404, detail=f"{question_number}번 문제 이미지를 찾을 수 없습니다")
     
-    return ExamQuestionResponse(
-        question_number=exam_question.question_number,
-        question_text=exam_question.question_text,
-        question_image=question_image_base64,
-        difficulty=exam_question.difficulty,
-        topic=exam_question.topic,
-        message="문제를 확인하신 후, 어떤 부분부터 시작하면 좋을지 물어보세요!"
+    image = select_image_variant(
+        entry,
+        variant=variant,
+        width=requested_image_width(request, w),
+        accept_webp="image/webp" in request.headers.get("accept", ""),
+        save_data=request.headers.get("save-data", "").strip().lower() == "on",
     )
-
-@app.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(
-    request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """채팅 기능 구현"""
-    logger.info(f"채팅 요청: 사용자 {current_user.username}, 이미지 포함: {bool(request.image_data)}")
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"이미지 변형본을 찾을 수 없습니다: {variant}")
     
-    try:
-        # 사용자별 채팅 세션 가져오기 또는 생성
-        chat_session = db.query(ChatSession).filter(
-            ChatSession.user_id == current_user.id
-        ).order_by(ChatSession.created_at.desc()).first()
-        
-        if not chat_session:
-            chat_session = ChatSession(user_id=current_user.id)
-            db.add(chat_session)
-            db.commit()
-            db.refresh(chat_session)
-        
-        # 이전 대화 맥락 가져오기
-        previous_messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == chat_session.id
-        ).order_by(ChatMessage.timestamp.desc()).limit(10).all()
-        
-        # 대화 맥락 구성
-        system_content = """당신은 AI 수학 튜터입니다. 다음 규칙을 반드시 지켜주세요.
+    # 내용 해시가 들어간 URL 이면 내용이 바뀔 일이 없으므로 1년간 캐시, 아니면 매번 ETag 로 재검증
+    if v and v == exam_image_version(entry):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    headers = {"ETag": image.etag, "Cache-Control": cache_control}
+    if not variant:
+        # 같은 URL 이라도 요청 헤더에 따라 다른 변형본을 보내므로 공유 캐시가 구분하도록 알립니다
+        headers["Vary"] = "Accept, Save-Data, Sec-CH-Width, Sec-CH-Viewport-Width, Sec-CH-DPR"
+        headers["Accept-CH"] = "Sec-CH-Width, Sec-CH-Viewport-Width, Sec-CH-DPR"
+    
+    if etag_matches(request.headers.get("if-none-match"), image.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=image.data, media_type=image.content_type, headers=headers)
+
+# AI 튜터 시스템 프롬프트
+SYSTEM_PROMPT = """당신은 AI 수학 튜터입니다. 다음 규칙을 반드시 지켜주세요.
 
 **절대 규칙:**
 1. 한 번에 최대 2-3문장만 말하세요
@@ -523,57 +916,188 @@ async def chat_with_ai(
 
 이렇게 짧게, 한 번에 하나씩만 확인하며 진행하세요."""
 
-        messages = [
-            {
-                "role": "system", 
-                "content": system_content
-            }
-        ]
+async def prepare_chat_turn(request: ChatRequest, current_user: User, db: AsyncSession):
+    """채팅 세션 조회/생성, 이전 대화 맥락과 현재 메시지(OCR 포함)로 업스트림 요청 메시지 구성
+    
+    세션 id 와 이전 대화는 대화 맥락 캐시에서 가져오고, 캐시에 없을 때만 DB 를 조회합니다.
+    (채팅 세션 id, 업스트림 메시지 목록, DB 에 저장할 사용자 메시지, 이전 대화 없는 첫 질문 여부) 를 반환합니다.
+    """
+    # 사용자별 채팅 세션 가져오기 또는 생성
+    session_id = conversation_cache.latest_session(current_user.id)
+    if session_id is None:
+        result = await db.execute(latest_chat_session_query(current_user.id))
+        chat_session = result.scalars().first()
         
-        # 이전 대화 추가 (최신 순서를 역순으로)
-        for msg in reversed(previous_messages):
-            messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+        if not chat_session:
+            chat_session = ChatSession(user_id=current_user.id)
+            db.add(chat_session)
+            await db.commit()
+            await db.refresh(chat_session)
+            # 새 세션은 이전 메시지가 없으므로 빈 버퍼로 시작
+            conversation_cache.fill(chat_session.id, [])
+        session_id = chat_session.id
+        conversation_cache.set_latest_session(current_user.id, session_id)
+    
+    # 이전 대화 맥락 가져오기
+    previous_messages = conversation_cache.get(session_id)
+    if previous_messages is None:
+        if chat_message_writer:
+            await chat_message_writer.wait_for_user(current_user.id)
+        result = await db.execute(recent_chat_messages_query(session_id, CHAT_CONTEXT_MESSAGES))
+        # 최신 순으로 읽었으므로 뒤집어 오래된 순으로 보관
+        previous_messages = [
+            {"id": msg.id, "role": msg.role, "content": msg.content} for msg in reversed(result.scalars().all())
+        ]
+        summary, summary_until_id = None, None
+        if CHAT_CONTEXT_MODE == CONTEXT_MODE_SUMMARY:
+            chat_session = await db.get(ChatSession, session_id)
+            if chat_session is not None:
+                summary, summary_until_id = chat_session.summary, chat_session.summary_until_id
+        conversation_cache.fill(session_id, previous_messages, summary, summary_until_id)
+    
+    # 요약 모드에서는 요약 + 요약 이후의 메시지만 사용
+    summary = None
+    if CHAT_CONTEXT_MODE == CONTEXT_MODE_SUMMARY:
+        summary, summary_until_id = conversation_cache.get_summary(session_id)
+        if summary:
+            previous_messages = [
+                msg for msg in previous_messages if msg.get("id") is None or msg["id"] > summary_until_id
+            ]
+    
+    # 현재 사용자 메시지 추가 - OCR 처리 통합
+    if request.image_data:
+        # 이미지에서 텍스트 추출
+        extracted_text = await extract_text_from_image(request.image_data)
         
-        # 현재 사용자 메시지 추가 - OCR 처리 통합
-        if request.image_data:
-            # 이미지에서 텍스트 추출
-            extracted_text = extract_text_from_image(request.image_data)
-            
-            # 추출된 텍스트로 메시지 구성
-            if request.message:
-                user_content = f"{request.message}\n\n[이미지에서 추출된 수학 문제: {extracted_text}]"
-            else:
-                user_content = f"다음 수학 문제를 단계별로 풀이해주세요:\n\n{extracted_text}"
-            
-            user_message = {
-                "role": "user",
-                "content": user_content
-            }
-            
-            db_user_content = f"{request.message or '이미지 업로드'} [OCR 추출: {extracted_text[:50]}...]"
-            
-            logger.info(f"OCR 추출 텍스트: {extracted_text[:100]}...")
+        # 추출된 텍스트로 메시지 구성
+        if request.message:
+            user_content = f"{request.message}\n\n[이미지에서 추출된 수학 문제: {extracted_text}]"
         else:
-            user_message = {
-                "role": "user",
-                "content": request.message
-            }
-            db_user_content = request.message
+            user_content = f"다음 수학 문제를 단계별로 풀이해주세요:\n\n{extracted_text}"
+        
+        user_message = {
+            "role": "user",
+            "content": user_content
+        }
+        
+        db_user_content = f"{request.message or '이미지 업로드'} [OCR 추출: {extracted_text[:50]}...]"
+        
+        logger.info(f"OCR 추출 텍스트: {extracted_text[:100]}...")
+    else:
+        user_message = {
+            "role": "user",
+            "content": request.message
+        }
+        db_user_content = request.message
+
+    first_turn = not previous_messages and not summary
+    
+    # 대화 맥락 구성 (시스템 프롬프트 + 요약 + 예산 안의 최근 대화 + 현재 메시지)
+    messages, estimated_tokens = build_prompt(
+        SYSTEM_PROMPT, previous_messages, user_message, CHAT_PROMPT_TOKEN_BUDGET, summary=summary
+    )
+    
+    logger.info(f"API 요청 메시지 수: {len(messages)}, 추정 토큰: {estimated_tokens}")
+    return session_id, messages, db_user_content, first_turn
+
+async def save_chat_turn(db: AsyncSession, user_id: int, session_id: int, user_content: str, ai_message: str):
+    """사용자 메시지와 AI 응답을 채팅 기록에 저장하고 대화 맥락 캐시에도 반영
+    
+    write-behind 가 켜져 있으면 저장 큐에 넣고 바로 반환하며, 저장이 끝나면 캐시된 메시지에 id 를 채웁니다.
+    (앱 종료 중이라 큐가 닫혔으면 바로 저장합니다)
+    """
+    if chat_message_writer and chat_message_writer.accepting:
+        cached_messages = (
+            conversation_cache.append(session_id, "user", user_content),
+            conversation_cache.append(session_id, "assistant", ai_message),
+        )
+        saved = chat_message_writer.submit(user_id, session_id, [("user", user_content), ("assistant", ai_message)])
+        saved.add_done_callback(lambda future: on_chat_turn_saved(future, session_id, cached_messages))
+        return
+    
+    user_message_db = ChatMessage(
+        session_id=session_id,
+        role="user",
+        content=user_content
+    )
+    db.add(user_message_db)
+    
+    ai_response_message = ChatMessage(
+        session_id=session_id,
+        role="assistant",
+        content=ai_message
+    )
+    db.add(ai_response_message)
+    
+    await db.commit()
+    
+    conversation_cache.append(session_id, "user", user_content, user_message_db.id)
+    conversation_cache.append(session_id, "assistant", ai_message, ai_response_message.id)
+    if conversation_summarizer:
+        conversation_summarizer.maybe_schedule(session_id)
+
+def on_chat_turn_saved(future: asyncio.Future, session_id: int, cached_messages):
+    """write-behind 저장 완료 후 캐시된 메시지에 id 반영 및 요약 갱신 예약
+
+    저장에 실패하면 저장되지 않은 메시지가 다음 프롬프트에 들어가지 않도록 세션 버퍼를 비워
+    다음 턴에 DB 에서 다시 읽게 합니다.
+    """
+    if future.cancelled() or future.exception() is not None:
+        logger.error(f"채팅 기록 저장 실패: 세션 {session_id}, 대화 맥락 캐시를 비웁니다")
+        conversation_cache.invalidate(session_id)
+        return
+    for message, message_id in zip(cached_messages, future.result()):
+        if message is not None:
+            message["id"] = message_id
+    if conversation_summarizer:
+        conversation_summarizer.maybe_schedule(session_id)
+
+def enforce_chat_rate_limit(user: User, has_image: bool):
+    """사용자별 토큰 버킷 확인 (OCR, DB, 업스트림 호출 전에 거절)"""
+    if not chat_rate_limiters:
+        return
+    kind = "image" if has_image else "text"
+    limiter = chat_rate_limiters[kind]
+    retry_after = limiter.acquire(user.id)
+    if limiter.disabled:
+        ERRORS.inc(type="rate_limited")
+        raise HTTPException(
+            status_code=403,
+            detail="이미지 채팅이 비활성화되어 있습니다" if has_image else "채팅이 비활성화되어 있습니다"
+        )
+    if retry_after:
+        seconds = retry_after_header(retry_after)
+        logger.warning(f"채팅 요청 빈도 제한: 사용자 {user.username} ({kind}), {seconds}초 후 허용")
+        ERRORS.inc(type="rate_limited")
+        raise HTTPException(
+            status_code=429,
+            detail=f"요청이 너무 잦습니다. {seconds}초 후 다시 시도해주세요",
+            headers={"Retry-After": str(seconds)}
+        )
 
-        messages.append(user_message)
+@app.post("/chat", response_model=ChatResponse)
+async def chat_with_ai(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """채팅 기능 구현"""
+    logger.info(f"채팅 요청: 사용자 {current_user.username}, 이미지 포함: {bool(request.image_data)}")
+    enforce_chat_rate_limit(current_user, bool(request.image_data))
+    
+    try:
+        session_id, messages, db_user_content, first_turn = await prepare_chat_turn(request, current_user, db)
         
-        logger.info(f"API 요청 메시지 수: {len(messages)}")
+        cache_key = ChatResponseCache.make_key(messages) if chat_response_cache and first_turn else None
+        cached = chat_response_cache.get(cache_key) if cache_key else None
         
-        # ChatGPT API 호출
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                BOOTCAMP_API_URL,
-                json=messages,
-                timeout=30.0
-            )
+        if cached:
+            ai_message, usage_info = cached["response"], cached["usage"]
+            logger.info(f"첫 질문 응답 캐시 적중: 사용자 {current_user.username}")
+        else:
+            # ChatGPT API 호출 (공유 연결 풀 사용)
+            started = time.perf_counter()
+            response = await upstream.post(messages)
             
             response.raise_for_status()
             response_data = response.json()
@@ -583,29 +1107,20 @@ async def chat_with_ai(
             if 'error' in response_data:
                 error_msg = response_data['error'].get('message', 'Unknown API error')
                 logger.error(f"API 에러: {error_msg}")
+                ERRORS.inc(type="upstream_error")
                 raise HTTPException(status_code=500, detail=f"AI 서비스 오류: {error_msg}")
             
             ai_message = response_data["choices"][0]["message"]["content"]
             usage_info = response_data.get("usage", {})
+            record_usage(usage_info)
             
             logger.info(f"AI 응답 길이: {len(ai_message)} characters")
+            
+            if cache_key:
+                chat_response_cache.set(cache_key, ai_message, usage_info, (time.perf_counter() - started) * 1000)
         
         # 채팅 기록 저장
-        user_message_db = ChatMessage(
-            session_id=chat_session.id,
-            role="user",
-            content=db_user_content
-        )
-        db.add(user_message_db)
-        
-        ai_response_message = ChatMessage(
-            session_id=chat_session.id,
-            role="assistant",
-            content=ai_message
-        )
-        db.add(ai_response_message)
-        
-        db.commit()
+        await save_chat_turn(db, current_user.id, session_id, db_user_content, ai_message)
         
         logger.info(f"채팅 응답 성공: 사용자 {current_user.username}")
         
@@ -614,73 +1129,277 @@ async def chat_with_ai(
             usage=usage_info
         )
         
+    except HTTPException:
+        raise
+    except CircuitOpenError as e:
+        logger.warning(f"업스트림 서킷 열림, 요청 거절: {e}")
+        ERRORS.inc(type="upstream_circuit_open")
+        raise HTTPException(
+            status_code=503,
+            detail="AI 서비스가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    except UpstreamOverloadedError as e:
+        logger.warning(f"업스트림 동시 호출 한도 초과, 요청 거절: {e}")
+        ERRORS.inc(type="upstream_overloaded")
+        raise HTTPException(
+            status_code=503,
+            detail="요청이 많아 지금은 답변할 수 없습니다. 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
     except httpx.TimeoutException:
         logger.error("API 요청 시간 초과")
+        ERRORS.inc(type="upstream_timeout")
         raise HTTPException(status_code=408, detail="AI 응답 시간이 초과되었습니다")
     except httpx.HTTPStatusError as e:
         logger.error(f"API HTTP 오류: {e.response.status_code}")
+        ERRORS.inc(type="upstream_http_status")
         raise HTTPException(status_code=e.response.status_code, detail=f"AI 서비스 오류: {e}")
     except Exception as e:
         logger.error(f"채팅 처리 중 오류: {str(e)}")
+        ERRORS.inc(type="chat_internal")
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
+def sse_event(event: str, data: Dict) -> str:
+    """Server-Sent Events 형식의 이벤트 문자열 생성"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def cached_stream(entry: Dict):
+    """캐시된 응답을 업스트림 스트림과 같은 조각 형식으로 내보냄"""
+    yield {"content": entry["response"]}
+    if entry["usage"]:
+        yield {"usage": entry["usage"]}
+
+@app.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """채팅 스트리밍 (SSE) - 업스트림 토큰을 받는 즉시 브라우저로 전달"""
+    logger.info(f"스트리밍 채팅 요청: 사용자 {current_user.username}, 이미지 포함: {bool(request.image_data)}")
+    enforce_chat_rate_limit(current_user, bool(request.image_data))
+    
+    try:
+        session_id, messages, db_user_content, first_turn = await prepare_chat_turn(request, current_user, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"채팅 처리 중 오류: {str(e)}")
+        ERRORS.inc(type="chat_internal")
+        raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
+    
+    username = current_user.username
+    user_id = current_user.id
+    cache_key = ChatResponseCache.make_key(messages) if chat_response_cache and first_turn else None
+    cached = chat_response_cache.get(cache_key) if cache_key else None
+    
+    async def event_stream():
+        parts = []
+        usage_info = {}
+        started = time.perf_counter()
+        try:
+            if cached:
+                # 캐시된 첫 질문 응답은 한 번에 전달
+                logger.info(f"첫 질문 응답 캐시 적중 (스트리밍): 사용자 {username}")
+                chunks = cached_stream(cached)
+            else:
+                chunks = upstream.stream(messages)
+            # 연결이 끊기거나 오류가 나면 GC 를 기다리지 않고 바로 업스트림 응답, 호출 슬롯, 공유 스트림 구독을 정리합니다
+            async with contextlib.aclosing(chunks):
+                async for chunk in chunks:
+                    if "usage" in chunk:
+                        usage_info = chunk["usage"]
+                    if chunk.get("content"):
+                        parts.append(chunk["content"])
+                        yield sse_event("delta", {"content": chunk["content"]})
+        except asyncio.CancelledError:
+            # 클라이언트 연결이 끊기면 업스트림 스트림도 닫히며, 미완성 응답은 저장하지 않습니다
+            logger.info(f"스트리밍 중 클라이언트 연결 종료: 사용자 {username}")
+            ERRORS.inc(type="stream_client_disconnected")
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"업스트림 서킷 열림, 스트리밍 요청 거절: {e}")
+            ERRORS.inc(type="upstream_circuit_open")
+            yield sse_event("error", {
+                "detail": "AI 서비스가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해주세요",
+                "retry_after": max(1, math.ceil(e.retry_after))
+            })
+            return
+        except UpstreamOverloadedError as e:
+            logger.warning(f"업스트림 동시 호출 한도 초과, 스트리밍 요청 거절: {e}")
+            ERRORS.inc(type="upstream_overloaded")
+            yield sse_event("error", {
+                "detail": "요청이 많아 지금은 답변할 수 없습니다. 잠시 후 다시 시도해주세요",
+                "retry_after": max(1, math.ceil(e.retry_after))
+            })
+            return
+        except httpx.TimeoutException:
+            logger.error("API 스트리밍 시간 초과")
+            ERRORS.inc(type="upstream_timeout")
+            yield sse_event("error", {"detail": "AI 응답 시간이 초과되었습니다"})
+            return
+        except Exception as e:
+            logger.error(f"API 스트리밍 오류: {e}")
+            ERRORS.inc(type="upstream_stream_error")
+            yield sse_event("error", {"detail": f"AI 서비스 오류: {e}"})
+            return
+        
+        ai_message = "".join(parts)
+        logger.info(f"AI 스트리밍 응답 길이: {len(ai_message)} characters")
+        if not cached:
+            record_usage(usage_info)
+        
+        if cache_key and not cached and ai_message:
+            chat_response_cache.set(cache_key, ai_message, usage_info, (time.perf_counter() - started) * 1000)
+        
+        # 스트림이 끝난 뒤 전체 응답을 한 번에 저장합니다
+        # (응답 전송 중에는 요청 의존성의 DB 세션이 닫혀 있을 수 있어 별도 세션 사용)
+        try:
+            async with AsyncSessionLocal() as stream_db:
+                await save_chat_turn(stream_db, user_id, session_id, db_user_content, ai_message)
+        except Exception as e:
+            logger.error(f"스트리밍 채팅 기록 저장 실패: {e}")
+            ERRORS.inc(type="chat_save_failed")
+        
+        yield sse_event("done", {"usage": usage_info})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 채팅 기록 페이지네이션 관련 함수들
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(시각, id) 키를 불투명한 커서 문자열로 변환"""
+    raw = json.dumps({"t": created_at.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    """커서 문자열을 (시각, id) 로 복원 (잘못된 커서는 400)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다")
+
+def serialize_chat_message(role: str, content: str, timestamp: datetime) -> Dict:
+    return {"role": role, "content": content, "timestamp": timestamp}
+
+def clamp_page_size(value: Optional[int], default: int, maximum: int) -> int:
+    return max(1, min(value or default, maximum))
+
 @app.get("/chat-history")
 async def get_chat_history(
+    limit: Optional[int] = Query(None, ge=1, description="한 페이지의 세션 수"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    messages_per_session: Optional[int] = Query(None, ge=1, description="세션별로 포함할 최근 메시지 수"),
+    summary: bool = Query(False, description="true 이면 메시지 본문 없이 세션 정보만 반환"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """사용자별 채팅 기록 조회 기능"""
-    logger.info(f"채팅 기록 조회: 사용자 {current_user.username}")
+    """사용자별 채팅 기록 조회 기능 (최신 세션부터 커서 기반 페이지네이션)
     
-    chat_sessions = db.query(ChatSession).filter(
-        ChatSession.user_id == current_user.id
-    ).order_by(ChatSession.created_at.desc()).all()
+    세션 페이지와 세션별 최근 메시지를 한 번의 쿼리로 가져옵니다.
+    더 오래된 메시지는 각 세션의 messages_cursor 로 /chat-session/{id}/messages 에서 이어서 조회합니다.
+    """
+    limit = clamp_page_size(limit, CHAT_HISTORY_PAGE_SIZE, CHAT_HISTORY_MAX_PAGE_SIZE)
+    per_session = clamp_page_size(messages_per_session, CHAT_HISTORY_MESSAGES_PER_SESSION,
+                             CHAT_HISTORY_MAX_MESSAGES_PER_SESSION)
+    logger.info(f"채팅 기록 조회: 사용자 {current_user.username}, 세션 {limit}개, 요약 {summary}")
+    
+    # 방금 보낸 메시지가 아직 저장 큐에 있으면 저장될 때까지 기다립니다 (read-your-writes)
+    if chat_message_writer:
+        await chat_message_writer.wait_for_user(current_user.id)
+    
+    query = chat_history_page_query(
+        current_user.id, limit, per_session,
+        cursor=decode_cursor(cursor) if cursor else None, summary=summary
+    )
+    rows = (await db.execute(query)).all()
     
     history = []
-    for session in chat_sessions:
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session.id
-        ).order_by(ChatMessage.timestamp.asc()).all()
-        
-        session_data = {
-            "session_id": session.id,
-            "created_at": session.created_at,
-            "messages": [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp
-                }
-                for msg in messages
-            ]
-        }
-        history.append(session_data)
+    sessions_by_id = {}
+    for row in rows:
+        session_data = sessions_by_id.get(row.id)
+        if session_data is None:
+            session_data = {"session_id": row.id, "created_at": row.created_at}
+            if summary:
+                session_data["message_count"] = row.message_count
+                session_data["last_message_at"] = row.last_message_at
+            else:
+                session_data["message_count"] = row.message_count or 0
+                session_data["messages"] = []
+                session_data["messages_cursor"] = None
+            sessions_by_id[row.id] = session_data
+            history.append(session_data)
+        if not summary and row.message_id is not None:
+            if not session_data["messages"]:
+                # 가장 오래된 포함 메시지 = 더 이전 메시지를 조회할 때의 기준점
+                if session_data["message_count"] > per_session:
+                    session_data["messages_cursor"] = encode_cursor(row.timestamp, row.message_id)
+            session_data["messages"].append(serialize_chat_message(row.role, row.content, row.timestamp))
+    
+    next_cursor = None
+    if len(history) > limit:
+        history = history[:limit]
+        last = history[-1]
+        next_cursor = encode_cursor(last["created_at"], last["session_id"])
+    
+    return {"chat_history": history, "next_cursor": next_cursor}
+
+@app.get("/chat-session/{session_id}/messages")
+async def get_chat_session_messages(
+    session_id: int,
+    limit: Optional[int] = Query(None, ge=1, description="가져올 메시지 수"),
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 메시지만 조회"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """채팅 세션의 메시지를 최신부터 거꾸로 페이지 단위로 조회 (응답은 시간 오름차순)"""
+    limit = clamp_page_size(limit, CHAT_HISTORY_MESSAGES_PER_SESSION, CHAT_HISTORY_MAX_MESSAGES_PER_SESSION)
+    if chat_message_writer:
+        await chat_message_writer.wait_for_user(current_user.id)
+    
+    result = await db.execute(owned_chat_session_query(session_id, current_user.id))
+    if result.scalars().first() is None:
+        raise HTTPException(status_code=404, detail="채팅 세션을 찾을 수 없습니다")
+    
+    query = chat_messages_page_query(session_id, limit, before=decode_cursor(before) if before else None)
+    rows = (await db.execute(query)).all()
     
-    return {"chat_history": history}
+    has_more = len(rows) > limit
+    rows = list(reversed(rows[:limit]))
+    return {
+        "session_id": session_id,
+        "messages": [serialize_chat_message(row.role, row.content, row.timestamp) for row in rows],
+        "next_cursor": encode_cursor(rows[0].timestamp, rows[0].id) if has_more else None
+    }
 
 @app.delete("/chat-session/{session_id}")
 async def delete_chat_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """채팅방 삭제 기능"""
     logger.info(f"채팅 세션 삭제 요청: 사용자 {current_user.username}, 세션 {session_id}")
+    # 저장 대기 중인 메시지가 삭제 뒤에 다시 들어오지 않도록 먼저 저장을 마칩니다
+    if chat_message_writer:
+        await chat_message_writer.wait_for_user(current_user.id)
     
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    result = await db.execute(owned_chat_session_query(session_id, current_user.id))
+    session = result.scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="채팅 세션을 찾을 수 없습니다")
     
-    # 관련 메시지들 삭제
-    db.query(ChatMessage).filter(ChatMessage.session_id == session_id).delete()
-    
-    # 세션 삭제
-    db.delete(session)
-    db.commit()
+    # 세션 삭제 (관련 메시지는 외래 키 ON DELETE CASCADE 로 함께 삭제)
+    await db.delete(session)
+    await db.commit()
+    conversation_cache.discard(session_id)
     
     logger.info(f"채팅 세션 삭제 완료: 세션 {session_id}")
     return {"message": "채팅 세션이 삭제되었습니다"}
@@ -0,0 +1,241 @@
+# Prometheus 지표 - backend/metrics.py
+# 외부 라이브러리 없이 카운터/히스토그램/게이지를 메모리에 모아 /metrics 에서 텍스트 형식으로 내보냅니다.
+# 관측 한 번은 딕셔너리 조회 + 이분 탐색 + 덧셈 몇 번이므로 운영 환경에서 항상 켜 두어도 부담이 없습니다.
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Response 가 text/* 에 charset=utf-8 을 붙입니다
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # 이벤트 루프 밖(동기 DB 엔진, 스레드 풀)에서도 관측하므로 잠금으로 보호합니다 (경합이 거의 없어 저렴)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """증가만 하는 누적 값"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """구간별 누적 개수 + 합계 + 개수 (Prometheus histogram)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 조합별 [구간별 개수..., +Inf 개수, 합계]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        """with 블록의 실행 시간을 관측 (예외가 나도 기록)"""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series_list = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in series_list:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Gauge(_Metric):
+    """수집 시점에 함수를 호출해 읽는 현재 값 (관측 비용 없음)"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Optional[float]]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def render(self) -> List[str]:
+        value = self.read()
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], Optional[float]]) -> Gauge:
+        return self.register(Gauge(name, documentation, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍 응답은 마지막 조각까지)",
+    ("method", "route", "status"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+))
+OCR_SECONDS = REGISTRY.register(Histogram(
+    "ocr_duration_seconds", "이미지 OCR 처리 시간 (extract_text_from_image)",
+    ("outcome",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "업스트림 AI API HTTP 요청 시간 (스트림은 마지막 조각까지, 재시도/헤징은 요청마다)",
+    ("kind", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "DB 쿼리 실행 시간 (SQLAlchemy cursor execute)",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+))
+UPSTREAM_TOKENS = REGISTRY.register(Counter(
+    "upstream_tokens_total", "업스트림 응답 usage 의 토큰 수 (응답 캐시 적중은 제외)",
+    ("type",),
+))
+ERRORS = REGISTRY.register(Counter(
+    "app_errors_total", "오류 발생 횟수 (종류별)",
+    ("type",),
+))
+
+
+def record_usage(usage: Optional[Dict]):
+    """업스트림 usage 딕셔너리의 토큰 수 누적"""
+    if not usage:
+        return
+    for token_type in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(token_type)
+        if isinstance(value, (int, float)):
+            UPSTREAM_TOKENS.inc(value, type=token_type[:-len("_tokens")])
+
+
+class MetricsMiddleware:
+    """라우트별 요청 시간 히스토그램 (순수 ASGI 미들웨어)
+
+    라우트 레이블은 실제 경로가 아닌 경로 템플릿(/chat-session/{session_id})이라 레이블 수가 늘어나지 않고,
+    스트리밍 응답도 마지막 본문 조각을 보낸 시점까지 잽니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "observed": False}
+
+        def observe():
+            if state["observed"]:
+                return
+            state["observed"] = True
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", None) or "unmatched",
+                status=str(state["status"]),
+            )
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception as e:
+            ERRORS.inc(type=f"unhandled_{type(e).__name__}")
+            raise
+        finally:
+            observe()
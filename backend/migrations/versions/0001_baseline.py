@@ -0,0 +1,74 @@
+"""기준 스키마 (Base.metadata.create_all 로 만들던 테이블)
+
+이전 버전이 create_all 로 만든 DB 에서도 그대로 실행할 수 있도록 없는 테이블만 만듭니다.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def create_table_if_missing(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade():
+    create_table_if_missing(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[
+            ("ix_users_id", ["id"], False),
+            ("ix_users_username", ["username"], True),
+            ("ix_users_email", ["email"], True),
+        ],
+    )
+    create_table_if_missing(
+        "exam_questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_number", sa.Integer()),
+        sa.Column("question_text", sa.Text()),
+        sa.Column("question_image", sa.LargeBinary()),
+        sa.Column("difficulty", sa.Integer()),
+        sa.Column("topic", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[
+            ("ix_exam_questions_id", ["id"], False),
+            ("ix_exam_questions_question_number", ["question_number"], True),
+        ],
+    )
+    create_table_if_missing(
+        "chat_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[("ix_chat_sessions_id", ["id"], False)],
+    )
+    create_table_if_missing(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("chat_sessions.id")),
+        sa.Column("role", sa.String()),
+        sa.Column("content", sa.Text()),
+        sa.Column("timestamp", sa.DateTime()),
+        indexes=[("ix_chat_messages_id", ["id"], False)],
+    )
+
+
+def downgrade():
+    for name in ("chat_messages", "chat_sessions", "exam_questions", "users"):
+        op.drop_table(name)
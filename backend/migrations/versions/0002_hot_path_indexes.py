@@ -0,0 +1,52 @@
+"""채팅 조회용 복합 인덱스와 ON DELETE CASCADE 외래 키
+
+- chat_sessions(user_id, created_at): 최근 세션 조회, 채팅 기록 페이지네이션
+- chat_messages(session_id, timestamp): 대화 맥락, 세션 메시지 페이지네이션
+- chat_sessions.user_id, chat_messages.session_id 외래 키에 ON DELETE CASCADE
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# 기준 스키마의 외래 키는 이름이 없으므로 (SQLite) batch 재생성 시 이 규칙으로 이름을 붙여 찾습니다
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+FOREIGN_KEYS = [
+    ("chat_sessions", "user_id", "users"),
+    ("chat_messages", "session_id", "chat_sessions"),
+]
+
+
+def replace_foreign_key(table, column, referred, ondelete):
+    """table.column → referred.id 외래 키를 ondelete 옵션으로 다시 만듭니다"""
+    name = f"fk_{table}_{column}_{referred}"
+    existing = [
+        fk for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if fk["constrained_columns"] == [column]
+    ]
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        for fk in existing:
+            batch_op.drop_constraint(fk["name"] or name, type_="foreignkey")
+        batch_op.create_foreign_key(name, referred, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade():
+    op.create_index("ix_chat_sessions_user_id_created_at", "chat_sessions", ["user_id", "created_at"])
+    op.create_index("ix_chat_messages_session_id_timestamp", "chat_messages", ["session_id", "timestamp"])
+    for table, column, referred in FOREIGN_KEYS:
+        replace_foreign_key(table, column, referred, ondelete="CASCADE")
+
+
+def downgrade():
+    for table, column, referred in reversed(FOREIGN_KEYS):
+        replace_foreign_key(table, column, referred, ondelete=None)
+    op.drop_index("ix_chat_messages_session_id_timestamp", table_name="chat_messages")
+    op.drop_index("ix_chat_sessions_user_id_created_at", table_name="chat_sessions")
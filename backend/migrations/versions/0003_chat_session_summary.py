@@ -0,0 +1,26 @@
+"""채팅 세션 누적 요약 컬럼
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("chat_sessions", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("chat_sessions", sa.Column("summary_until_id", sa.Integer(), nullable=True))
+    op.add_column("chat_sessions", sa.Column("summary_updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        batch_op.drop_column("summary_updated_at")
+        batch_op.drop_column("summary_until_id")
+        batch_op.drop_column("summary")
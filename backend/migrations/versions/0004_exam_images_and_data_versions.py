@@ -0,0 +1,56 @@
+"""문제 이미지 변형 테이블과 데이터 버전 테이블
+
+- exam_question_images: 업로드 시 미리 만든 문제 이미지 크기/형식 변형
+- data_versions: 수능 문제 등 메모리 캐시 데이터의 버전 (다른 워커의 변경 감지)
+
+이 테이블을 create_all 로 이미 만든 DB 에서도 실행할 수 있도록 없는 테이블만 만듭니다.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def create_table_if_missing(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade():
+    create_table_if_missing(
+        "exam_question_images",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_number", sa.Integer()),
+        sa.Column("variant", sa.String()),
+        sa.Column("content_type", sa.String()),
+        sa.Column("width", sa.Integer()),
+        sa.Column("height", sa.Integer()),
+        sa.Column("data", sa.LargeBinary()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.UniqueConstraint("question_number", "variant"),
+        indexes=[
+            ("ix_exam_question_images_id", ["id"], False),
+            ("ix_exam_question_images_question_number", ["question_number"], False),
+        ],
+    )
+    create_table_if_missing(
+        "data_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade():
+    op.drop_table("data_versions")
+    op.drop_table("exam_question_images")
@@ -0,0 +1,408 @@
+# OCR 워커 프로세스 - backend/ocr_worker.py
+# easyocr 추론은 CPU를 오래 점유하므로 이벤트 루프와 분리된 별도 프로세스에서 실행합니다.
+# 이 모듈은 워커 프로세스에서 import 되므로 main.py 를 import 하지 않습니다.
+import asyncio
+import importlib.metadata
+import io
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스마다 하나씩 보유하는 OCR 리더
+_reader = None
+
+# OCR 풀 상태값
+STATE_NOT_STARTED = "not_started"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+STATE_STOPPED = "stopped"
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """OCR 전 이미지 전처리 설정 (워커 프로세스로 전달되므로 불변 값만 보관)"""
+    max_long_edge: int = 1600       # 긴 변 최대 픽셀 (0 이면 축소하지 않음)
+    max_pixels: int = 40_000_000    # 디코딩 허용 최대 픽셀 수 (압축 폭탄 방지)
+    grayscale: bool = True
+    trim_margins: bool = False
+    trim_threshold: int = 245       # 이 값보다 밝은 픽셀은 여백으로 간주
+    trim_padding: int = 8
+
+    def signature(self) -> str:
+        """캐시 키에 포함할 설정 요약 (설정이 바뀌면 다른 결과로 취급)"""
+        return (f"e{self.max_long_edge}-g{int(self.grayscale)}"
+                f"-t{int(self.trim_margins)}:{self.trim_threshold}:{self.trim_padding}")
+
+
+def preprocess_image(image_bytes: bytes, options: PreprocessOptions) -> Tuple[Any, Dict[str, Any]]:
+    """EXIF 회전 보정 → 축소 → 흑백 변환 → 여백 제거 후 numpy 배열과 단계별 통계 반환"""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    if width * height > options.max_pixels:
+        raise ValueError(f"이미지 해상도가 너무 큽니다: {width}x{height}")
+    pixels_before = width * height
+    long_edge = max(width, height)
+    if options.max_long_edge and long_edge > options.max_long_edge:
+        # JPEG 는 디코더 단계에서 먼저 줄여 디코딩 비용 자체를 낮춥니다
+        scale = options.max_long_edge / long_edge
+        image.draft(image.mode, (round(width * scale), round(height * scale)))
+    image.load()
+    timings["decode"] = time.perf_counter() - started
+
+    # 휴대폰 사진은 EXIF 방향 값만 있고 픽셀은 회전되지 않은 경우가 많습니다
+    started = time.perf_counter()
+    image = ImageOps.exif_transpose(image)
+    timings["exif"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    long_edge = max(image.size)
+    if options.max_long_edge and long_edge > options.max_long_edge:
+        scale = options.max_long_edge / long_edge
+        new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(new_size, Image.LANCZOS)
+    timings["resize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if options.grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    timings["grayscale"] = time.perf_counter() - started
+
+    if options.trim_margins:
+        started = time.perf_counter()
+        # 밝은 배경을 0 으로 만든 마스크에서 내용이 있는 영역만 잘라냅니다
+        mask = image.convert("L").point(lambda value: 255 if value < options.trim_threshold else 0)
+        bbox = mask.getbbox()
+        if bbox:
+            left, top, right, bottom = bbox
+            pad = options.trim_padding
+            image = image.crop((
+                max(0, left - pad),
+                max(0, top - pad),
+                min(image.width, right + pad),
+                min(image.height, bottom + pad),
+            ))
+        timings["trim"] = time.perf_counter() - started
+
+    stats = {
+        "pixels_before": pixels_before,
+        "pixels_after": image.width * image.height,
+        "timings_ms": {step: round(seconds * 1000, 1) for step, seconds in timings.items()},
+    }
+    return np.asarray(image), stats
+
+
+def init_worker(languages: Sequence[str], gpu: bool, torch_threads: int):
+    """워커 프로세스 초기화: torch 스레드 제한, easyocr 리더 생성, 워밍업 추론"""
+    global _reader
+
+    # 프로세스 여러 개가 코어를 나눠 쓰므로 프로세스당 스레드 수를 제한합니다
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    import easyocr
+    _reader = easyocr.Reader(list(languages), gpu=gpu)
+
+    # 첫 실제 요청이 torch 초기화 비용을 치르지 않도록 합성 이미지로 한 번 추론합니다
+    _reader.readtext(_make_warmup_image())
+
+
+def _make_warmup_image() -> bytes:
+    """워밍업용 합성 수식 이미지 (PNG 바이트)"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (240, 64), color=255)
+    ImageDraw.Draw(image).text((10, 20), "2x + 3 = 11", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def ping() -> int:
+    """워커가 리더를 보유하고 있는지 확인 (워커 PID 반환)"""
+    if _reader is None:
+        raise RuntimeError("OCR 리더가 초기화되지 않았습니다")
+    return os.getpid()
+
+
+def run_ocr(image_bytes: bytes, options: PreprocessOptions) -> Tuple[List[Tuple[str, float]], Dict[str, Any]]:
+    """이미지 바이트를 전처리한 뒤 (텍스트, 신뢰도) 목록과 전처리/추론 통계 추출"""
+    if _reader is None:
+        raise RuntimeError("OCR 리더가 초기화되지 않았습니다")
+
+    image, stats = preprocess_image(image_bytes, options)
+
+    started = time.perf_counter()
+    results = _reader.readtext(image)
+    stats["timings_ms"]["readtext"] = round((time.perf_counter() - started) * 1000, 1)
+
+    return _to_pairs(results), stats
+
+
+def run_ocr_batch(images: List[bytes], options: PreprocessOptions,
+                  max_padding_ratio: float = 2.0) -> List[Tuple[str, Any, Any]]:
+    """여러 이미지를 한 번에 인식합니다.
+
+    전처리된 이미지를 같은 크기의 흰 캔버스에 붙여 readtext_batched 로 한 번에 추론하고,
+    이미지마다 ("ok", 결과, 통계) 또는 ("error", 메시지, None) 를 같은 순서로 반환합니다.
+    크기 차이가 커서 패딩 면적이 실제 면적의 max_padding_ratio 배를 넘으면 이미지별로 추론합니다.
+    """
+    import numpy as np
+
+    if _reader is None:
+        raise RuntimeError("OCR 리더가 초기화되지 않았습니다")
+
+    outcomes: List[Tuple[str, Any, Any]] = [("error", "처리되지 않음", None)] * len(images)
+    prepared = []
+    for index, image_bytes in enumerate(images):
+        try:
+            image, stats = preprocess_image(image_bytes, options)
+            stats["batch_size"] = len(images)
+            prepared.append((index, image, stats))
+        except Exception as e:
+            outcomes[index] = ("error", str(e), None)
+
+    if not prepared:
+        return outcomes
+
+    height = max(image.shape[0] for _, image, _ in prepared)
+    width = max(image.shape[1] for _, image, _ in prepared)
+    actual_area = sum(image.shape[0] * image.shape[1] for _, image, _ in prepared)
+    use_batched = len(prepared) > 1 and height * width * len(prepared) <= actual_area * max_padding_ratio
+
+    started = time.perf_counter()
+    try:
+        if use_batched:
+            canvases = []
+            for _, image, _ in prepared:
+                # 좌표가 바뀌지 않도록 왜곡 없이 왼쪽 위에 붙이고 나머지는 흰색으로 채웁니다
+                canvas = np.full((height, width) + image.shape[2:], 255, dtype=image.dtype)
+                canvas[:image.shape[0], :image.shape[1]] = image
+                canvases.append(canvas)
+            batch_results = _reader.readtext_batched(canvases, batch_size=len(canvases))
+        else:
+            batch_results = [_reader.readtext(image) for _, image, _ in prepared]
+    except Exception as e:
+        for index, _, _ in prepared:
+            outcomes[index] = ("error", str(e), None)
+        return outcomes
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    for (index, _, stats), results in zip(prepared, batch_results):
+        stats["timings_ms"]["readtext"] = elapsed_ms
+        stats["batched"] = use_batched
+        outcomes[index] = ("ok", _to_pairs(results), stats)
+    return outcomes
+
+
+def _to_pairs(results) -> List[Tuple[str, float]]:
+    """easyocr 결과에서 (텍스트, 신뢰도) 만 남깁니다 (경계 상자는 프로세스 간 전달하지 않음)"""
+    return [(str(result[1]), float(result[2])) for result in results]
+
+
+class OCRPool:
+    """easyocr 리더를 보유한 워커 프로세스 풀"""
+
+    def __init__(self, workers: int = 1, languages: Sequence[str] = ("ko", "en"),
+                 gpu: bool = False, torch_threads: int = 1):
+        self.workers = max(1, workers)
+        self.languages = tuple(language.strip() for language in languages if language.strip())
+        self.gpu = gpu
+        self.torch_threads = max(1, torch_threads)
+        self.state = STATE_NOT_STARTED
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        return self.state == STATE_READY
+
+    def signature(self) -> str:
+        """캐시 키에 포함할 모델 요약 (언어 목록이나 easyocr 버전이 바뀌면 인식 모델이 달라지므로 다른 결과로 취급)"""
+        try:
+            version = importlib.metadata.version("easyocr")
+        except importlib.metadata.PackageNotFoundError:
+            version = "unknown"
+        return f"easyocr{version}-{'+'.join(self.languages)}"
+
+    @property
+    def warming(self) -> bool:
+        return self.state in (STATE_NOT_STARTED, STATE_LOADING)
+
+    def start(self) -> bool:
+        """워커 프로세스를 띄우고 모든 워커의 리더 로드/워밍업이 끝날 때까지 대기 (블로킹)"""
+        self.state = STATE_LOADING
+        # torch 는 fork 이후 동작이 불안정하므로 spawn 컨텍스트를 사용합니다
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(self.languages, self.gpu, self.torch_threads),
+        )
+        try:
+            # 워커 수만큼 동시에 제출해야 모든 프로세스가 미리 생성됩니다
+            futures = [self._executor.submit(ping) for _ in range(self.workers)]
+            pids = {future.result() for future in futures}
+            if self._executor is None:
+                # 로드 도중 서버 종료로 풀이 정리된 경우
+                return False
+            logger.info(f"OCR 워커 준비 완료: {len(pids)}개 프로세스 (프로세스당 torch 스레드 {self.torch_threads}개)")
+            self.state = STATE_READY
+        except Exception as e:
+            logger.error(f"OCR 워커 초기화 실패: {e}")
+            self.shutdown(STATE_FAILED)
+        return self.available
+
+    async def start_in_background(self) -> bool:
+        """이벤트 루프를 막지 않도록 별도 스레드에서 start() 실행"""
+        return await asyncio.to_thread(self.start)
+
+    async def recognize(self, image_bytes: bytes,
+                        options: PreprocessOptions) -> Tuple[List[Tuple[str, float]], Dict[str, Any]]:
+        """워커 프로세스에서 전처리와 OCR 을 실행하고 결과를 기다립니다"""
+        if not self.available or self._executor is None:
+            raise RuntimeError("OCR 워커 풀을 사용할 수 없습니다")
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, run_ocr, image_bytes, options)
+        except BrokenProcessPool:
+            # 워커가 비정상 종료되면 풀 전체를 사용할 수 없으므로 비활성화합니다
+            logger.error("OCR 워커 프로세스가 비정상 종료되었습니다")
+            self.shutdown(STATE_FAILED)
+            raise
+
+    async def recognize_batch(self, images: List[bytes],
+                              options: PreprocessOptions) -> List[Tuple[str, Any, Any]]:
+        """워커 프로세스 하나에서 여러 이미지를 한 번에 인식합니다"""
+        if not self.available or self._executor is None:
+            raise RuntimeError("OCR 워커 풀을 사용할 수 없습니다")
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, run_ocr_batch, images, options)
+        except BrokenProcessPool:
+            logger.error("OCR 워커 프로세스가 비정상 종료되었습니다")
+            self.shutdown(STATE_FAILED)
+            raise
+
+    def shutdown(self, state: str = STATE_STOPPED):
+        """워커 프로세스 종료"""
+        self.state = state
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class OCRBatcher:
+    """짧은 시간 창 동안 들어온 OCR 요청을 모아 배치 추론으로 보내는 디스패처
+
+    쉬는 워커가 있으면 기다리지 않고 바로 보내고, 모든 워커가 바쁠 때만 요청을 모읍니다.
+    모은 요청은 워커 수만큼 나눠 보내므로 OCR_WORKERS>1 의 병렬성을 잃지 않습니다.
+    """
+
+    def __init__(self, pool: OCRPool, window_ms: float = 0, max_batch_size: int = 8):
+        self.pool = pool
+        self.window_seconds = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[PreprocessOptions, List[Tuple[bytes, asyncio.Future]]] = {}
+        self._timers: Dict[PreprocessOptions, asyncio.TimerHandle] = {}
+        self._tasks = set()
+        # 이 디스패처가 워커에 보내 실행 중인 작업 수 (단건 + 배치)
+        self._busy = 0
+        self.direct = 0
+        self.batches = 0
+        self.images = 0
+        self.max_observed_batch = 0
+
+    async def recognize(self, image_bytes: bytes,
+                        options: PreprocessOptions) -> Tuple[List[Tuple[str, float]], Dict[str, Any]]:
+        """요청을 대기열에 넣고 배치 결과 중 자기 몫을 기다립니다"""
+        idle_worker = self._busy < self.pool.workers and options not in self._pending
+        if self.window_seconds == 0 or self.max_batch_size == 1 or idle_worker:
+            self.direct += 1
+            self._busy += 1
+            try:
+                return await self.pool.recognize(image_bytes, options)
+            finally:
+                self._busy -= 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(options, [])
+        pending.append((image_bytes, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(options)
+        elif options not in self._timers:
+            self._timers[options] = loop.call_later(self.window_seconds, self._flush, options)
+
+        return await future
+
+    def _flush(self, options: PreprocessOptions):
+        """대기 중인 요청을 워커 수만큼 나눈 배치로 보냅니다 (배치마다 워커 하나)"""
+        timer = self._timers.pop(options, None)
+        if timer:
+            timer.cancel()
+        items = self._pending.pop(options, [])
+        # 이미 취소된 요청은 배치에서 제외합니다
+        items = [(image_bytes, future) for image_bytes, future in items if not future.done()]
+        if not items:
+            return
+        size = math.ceil(len(items) / min(self.pool.workers, len(items)))
+        for start in range(0, len(items), size):
+            task = asyncio.ensure_future(self._run_batch(items[start:start + size], options))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items: List[Tuple[bytes, asyncio.Future]], options: PreprocessOptions):
+        self.batches += 1
+        self.images += len(items)
+        self.max_observed_batch = max(self.max_observed_batch, len(items))
+        self._busy += 1
+        try:
+            outcomes = await self.pool.recognize_batch([image_bytes for image_bytes, _ in items], options)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._busy -= 1
+
+        for (_, future), (status, payload, stats) in zip(items, outcomes):
+            if future.done():
+                continue
+            if status == "ok":
+                future.set_result((payload, stats))
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": round(self.window_seconds * 1000, 1),
+            "max_batch_size": self.max_batch_size,
+            "direct": self.direct,
+            "busy": self._busy,
+            "batches": self.batches,
+            "images": self.images,
+            "avg_batch_size": round(self.images / self.batches, 2) if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+            "queued": sum(len(items) for items in self._pending.values()),
+        }
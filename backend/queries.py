@@ -0,0 +1,108 @@
+# 자주 실행되는 조회 쿼리 모음 - backend/queries.py
+# 엔드포인트와 쿼리 실행 계획 테스트(test_query_plans.py)가 같은 쿼리를 쓰도록 한 곳에서 만듭니다.
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, and_, func, or_, select
+
+from database import ChatMessage, ChatSession, User
+
+# (시각, id) 키셋 커서
+Cursor = Tuple[datetime, int]
+
+
+def user_by_username_query(username: str) -> Select:
+    return select(User).where(User.username == username)
+
+
+def user_by_email_query(email: str) -> Select:
+    return select(User).where(User.email == email)
+
+
+def latest_chat_session_query(user_id: int) -> Select:
+    """사용자의 가장 최근 채팅 세션"""
+    return select(ChatSession).where(
+        ChatSession.user_id == user_id
+    ).order_by(ChatSession.created_at.desc()).limit(1)
+
+
+def recent_chat_messages_query(session_id: int, limit: int) -> Select:
+    """세션의 최근 메시지 limit 개 (최신 순)"""
+    return select(ChatMessage).where(
+        ChatMessage.session_id == session_id
+    ).order_by(ChatMessage.timestamp.desc()).limit(limit)
+
+
+def owned_chat_session_query(session_id: int, user_id: int) -> Select:
+    """사용자 소유의 채팅 세션 (없으면 빈 결과)"""
+    return select(ChatSession).where(
+        ChatSession.id == session_id,
+        ChatSession.user_id == user_id
+    )
+
+
+def chat_history_page_query(user_id: int, limit: int, messages_per_session: int,
+                            cursor: Optional[Cursor] = None, summary: bool = False) -> Select:
+    """채팅 기록 한 페이지 (세션 limit + 1 개와 세션별 최근 메시지를 한 번에 조회)
+
+    세션은 (created_at, id) 내림차순 키셋으로 자르고, 마지막 한 개는 다음 페이지 존재 확인용입니다.
+    summary 이면 메시지 본문 대신 세션별 메시지 수와 마지막 메시지 시각만 계산합니다.
+    """
+    sessions_query = select(ChatSession.id, ChatSession.created_at).where(
+        ChatSession.user_id == user_id
+    )
+    if cursor:
+        cursor_time, cursor_id = cursor
+        sessions_query = sessions_query.where(or_(
+            ChatSession.created_at < cursor_time,
+            and_(ChatSession.created_at == cursor_time, ChatSession.id < cursor_id)
+        ))
+    page = sessions_query.order_by(
+        ChatSession.created_at.desc(), ChatSession.id.desc()
+    ).limit(limit + 1).subquery()
+
+    if summary:
+        # 세션 정보 + 메시지 수 + 마지막 메시지 시각 (본문 제외)
+        return select(
+            page.c.id, page.c.created_at,
+            func.count(ChatMessage.id).label("message_count"),
+            func.max(ChatMessage.timestamp).label("last_message_at")
+        ).outerjoin(
+            ChatMessage, ChatMessage.session_id == page.c.id
+        ).group_by(page.c.id, page.c.created_at).order_by(
+            page.c.created_at.desc(), page.c.id.desc()
+        )
+
+    # 세션별 최신 메시지부터 순위를 매겨 messages_per_session 개까지만 함께 조인
+    ranked = select(
+        ChatMessage.id, ChatMessage.session_id, ChatMessage.role,
+        ChatMessage.content, ChatMessage.timestamp,
+        func.row_number().over(
+            partition_by=ChatMessage.session_id,
+            order_by=(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+        ).label("rank"),
+        func.count().over(partition_by=ChatMessage.session_id).label("message_count")
+    ).where(ChatMessage.session_id.in_(select(page.c.id))).subquery()
+    return select(
+        page.c.id, page.c.created_at,
+        ranked.c.id.label("message_id"), ranked.c.role, ranked.c.content,
+        ranked.c.timestamp, ranked.c.message_count
+    ).outerjoin(
+        ranked, and_(ranked.c.session_id == page.c.id, ranked.c.rank <= messages_per_session)
+    ).order_by(
+        page.c.created_at.desc(), page.c.id.desc(), ranked.c.timestamp.asc(), ranked.c.id.asc()
+    )
+
+
+def chat_messages_page_query(session_id: int, limit: int, before: Optional[Cursor] = None) -> Select:
+    """세션 메시지 한 페이지 (before 보다 오래된 메시지 limit + 1 개, 최신 순)"""
+    query = select(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.timestamp).where(
+        ChatMessage.session_id == session_id
+    )
+    if before:
+        before_time, before_id = before
+        query = query.where(or_(
+            ChatMessage.timestamp < before_time,
+            and_(ChatMessage.timestamp == before_time, ChatMessage.id < before_id)
+        ))
+    return query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc()).limit(limit + 1)
@@ -0,0 +1,68 @@
+# 요청 빈도 제한 - backend/rate_limit.py
+# 사용자별 토큰 버킷으로 짧은 시간에 몰리는 요청을 거절합니다 (단일 프로세스 메모리 상태).
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class TokenBucketLimiter:
+    """키(사용자)별 토큰 버킷
+
+    버킷은 최대 burst 개의 토큰을 가지며 분당 rate_per_minute 개씩 다시 채워집니다.
+    요청마다 토큰 하나를 쓰고, 토큰이 없으면 다음 토큰이 생길 때까지의 시간을 돌려줍니다.
+    버킷은 (토큰 수, 갱신 시각) 두 값만 가지며 조회 시점에 채워진 양을 계산하므로 타이머가 필요 없습니다.
+    오래 쓰지 않은 버킷은 가득 찬 상태와 같으므로 max_keys 를 넘으면 가장 오래된 것부터 버립니다.
+    rate_per_minute 가 0 이하이면 모든 요청을 거절하고 무한대를 돌려줍니다 (disabled).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    @property
+    def disabled(self) -> bool:
+        return self.rate <= 0
+
+    def acquire(self, key: Hashable) -> float:
+        """토큰 하나 사용 (허용되면 0, 거절되면 다시 시도할 수 있을 때까지의 초)"""
+        if self.disabled:
+            self.rejected += 1
+            return float("inf")
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed += 1
+            return 0.0
+        self.rejected += 1
+        return (1 - bucket[0]) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "disabled": self.disabled,
+            "burst": self.burst,
+            "tracked_keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+def retry_after_header(retry_after: float, max_seconds: int = 3600) -> int:
+    """Retry-After 헤더 값 (1초 이상, max_seconds 이하의 정수 초, 무한대도 max_seconds 로)"""
+    return max(1, math.ceil(min(retry_after, max_seconds)))
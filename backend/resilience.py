@@ -0,0 +1,257 @@
+# 업스트림 호출 복원력 유틸리티 - backend/resilience.py
+# 재시도 백오프, 최근 지연 시간 분위수(헤징 지연 계산용), 서킷 브레이커, 적응형 동시 호출 제한을 제공합니다.
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 업스트림을 호출하지 않고 바로 실패한 경우"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"업스트림 장애로 호출을 잠시 중단했습니다 ({retry_after:.0f}초 후 재시도)")
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """attempt 번째 재시도 전 대기 시간 (지수 백오프 + full jitter)"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class LatencyWindow:
+    """최근 N개 응답 시간(ms)의 분위수"""
+
+    def __init__(self, size: int = 500):
+        self._samples: Deque[float] = deque(maxlen=max(1, size))
+        self.count = 0
+
+    def record(self, latency_ms: float):
+        self._samples.append(latency_ms)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(percent):
+            value = self.percentile(percent)
+            return round(value, 1) if value is not None else None
+
+        return {
+            "samples": len(self._samples),
+            "p50": rounded(50),
+            "p95": rounded(95),
+            "p99": rounded(99),
+        }
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold 번 쌓이면 열리고, reset_timeout 뒤 한 번의 시험 호출로 복구를 확인
+
+    closed → open: 연속 실패가 기준을 넘음 (이후 호출은 CircuitOpenError 로 즉시 실패)
+    open → half_open: reset_timeout 이 지난 뒤 첫 호출 (시험 호출 하나만 허용)
+    half_open → closed / open: 시험 호출 성공 / 실패
+    상태 전이 횟수와 최근 전이 기록을 stats 로 내보냅니다.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, history_size: int = 20):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _transition(self, state: str):
+        name = f"{self.state}->{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self._history.append({"transition": name, "at": time.time(), "consecutive_failures": self.consecutive_failures})
+        log = logger.warning if state == CIRCUIT_OPEN else logger.info
+        log(f"업스트림 서킷 상태 전이: {name} (연속 실패 {self.consecutive_failures}회)")
+        self.state = state
+        if state == CIRCUIT_OPEN:
+            self._opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def acquire(self) -> bool:
+        """호출 전 확인 (열려 있거나 시험 호출이 진행 중이면 CircuitOpenError), 시험 호출이면 True"""
+        if self.state == CIRCUIT_OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_after())
+            self._transition(CIRCUIT_HALF_OPEN)
+        if self.state == CIRCUIT_HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(1.0)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self, success: Optional[bool], probe: bool = False):
+        """호출 결과 기록 (None 이면 결과 없이 취소된 호출, probe 는 acquire 의 반환값)"""
+        if probe:
+            self._probe_in_flight = False
+        if success is None:
+            return
+        if success:
+            self.consecutive_failures = 0
+            if self.state != CIRCUIT_CLOSED:
+                self._transition(CIRCUIT_CLOSED)
+            return
+        self.consecutive_failures += 1
+        if self.state == CIRCUIT_HALF_OPEN and probe:
+            self._transition(CIRCUIT_OPEN)
+        elif self.state == CIRCUIT_CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._transition(CIRCUIT_OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout,
+            "retry_after_seconds": round(self.retry_after(), 1) if self.state == CIRCUIT_OPEN else 0,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+            "recent_transitions": list(self._history),
+        }
+
+
+class UpstreamOverloadedError(Exception):
+    """동시 호출 한도가 찼고 대기열도 가득 찼거나 대기 시간이 지나 요청을 버린 경우"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"업스트림 호출이 몰려 요청을 처리하지 못했습니다 ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """관측한 지연 시간에 따라 동시 호출 한도를 조절하는 AIMD 리미터
+
+    호출이 latency_target 안에 성공하면 한도를 1/한도 씩 늘리고 (한도만큼 성공하면 +1),
+    시간 초과/과부하 응답이거나 latency_target 을 넘기면 한도에 backoff_ratio 를 곱해 줄입니다.
+    한 번 줄인 뒤에는 그 시점에 진행 중이던 호출들이 끝날 때까지 (latency_target 동안) 다시 줄이지 않습니다.
+    한도가 차면 최대 max_queue 개까지 queue_timeout 동안 기다리게 하고, 그 이상은 바로 거절합니다.
+    """
+
+    def __init__(self, initial_limit: int = 20, min_limit: int = 1, max_limit: int = 100,
+                 latency_target: float = 10.0, backoff_ratio: float = 0.75,
+                 max_queue: int = 100, queue_timeout: float = 5.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.queued_total = 0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, wait: bool = True):
+        """호출 슬롯 확보 (확보하지 못하면 UpstreamOverloadedError)"""
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if not wait or len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise UpstreamOverloadedError("대기열 가득 참")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued_total += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_deadline += 1
+            raise UpstreamOverloadedError("대기 시간 초과")
+        except asyncio.CancelledError:
+            # 슬롯을 넘겨받은 직후 취소되었으면 다음 대기자에게 돌려줍니다
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """호출 종료 기록 (latency 는 초, 결과 없이 취소된 호출이면 None)"""
+        if overloaded or (latency is not None and latency > self.latency_target):
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+                self.decreases += 1
+                logger.warning(f"업스트림 동시 호출 한도 감소: {self.current_limit}")
+        elif latency is not None and self.in_flight >= self.current_limit // 2:
+            # 한도를 절반 이상 쓰고 있을 때만 늘립니다 (여유가 있는데 한도만 커지지 않도록)
+            before = self.current_limit
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if self.current_limit > before:
+                self.increases += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.current_limit:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current_limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "latency_target_seconds": self.latency_target,
+            "queued_total": self.queued_total,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
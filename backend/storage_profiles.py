@@ -0,0 +1,142 @@
+# DB 저장소 성능 프로필 - backend/storage_profiles.py
+# DB_PROFILE 환경변수로 SQLite PRAGMA 와 PostgreSQL 연결 풀/문장 캐시 설정 묶음을 고릅니다.
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """DB 엔진 설정 묶음
+
+    sqlite_pragmas 는 SQLite 연결마다 실행할 (이름, 값) 목록이고,
+    나머지는 PostgreSQL 등 서버 DB 의 연결 풀과 문장 캐시 설정입니다 (None 이면 SQLAlchemy 기본값).
+    """
+    name: str
+    description: str
+    sqlite_pragmas: Tuple[Tuple[str, Any], ...] = ()
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: Optional[float] = None
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    # SQLAlchemy 가 컴파일한 SQL 을 재사용하는 캐시 크기 (모든 DB)
+    query_cache_size: Optional[int] = None
+    # asyncpg 연결별 prepared statement 캐시 크기 (PgBouncer transaction 모드에서는 0)
+    prepared_statement_cache_size: Optional[int] = None
+
+
+STORAGE_PROFILES: Dict[str, StorageProfile] = {profile.name: profile for profile in (
+    StorageProfile(
+        name="legacy",
+        description="설정 없음 (롤백 저널, SQLAlchemy 기본 풀) - 벤치마크 기준선",
+    ),
+    StorageProfile(
+        name="balanced",
+        description="WAL + synchronous=NORMAL, 적당한 캐시와 풀",
+        sqlite_pragmas=(
+            ("journal_mode", "WAL"),
+            ("synchronous", "NORMAL"),
+            ("busy_timeout", 5000),
+            ("cache_size", -16000),  # 음수는 KiB 단위 (약 16MB)
+            ("mmap_size", 64 * 1024 * 1024),
+            ("temp_store", "MEMORY"),
+        ),
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=10,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        query_cache_size=500,
+        prepared_statement_cache_size=256,
+    ),
+    StorageProfile(
+        name="durable",
+        description="WAL + synchronous=FULL (커밋마다 fsync), 작은 풀",
+        sqlite_pragmas=(
+            ("journal_mode", "WAL"),
+            ("synchronous", "FULL"),
+            ("busy_timeout", 10000),
+            ("cache_size", -16000),
+            ("temp_store", "MEMORY"),
+        ),
+        pool_size=5,
+        max_overflow=5,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        query_cache_size=500,
+        prepared_statement_cache_size=256,
+    ),
+    StorageProfile(
+        name="throughput",
+        description="WAL + synchronous=NORMAL, 큰 캐시/mmap, 큰 풀 (pre-ping 생략)",
+        sqlite_pragmas=(
+            ("journal_mode", "WAL"),
+            ("synchronous", "NORMAL"),
+            ("busy_timeout", 5000),
+            ("cache_size", -65536),
+            ("mmap_size", 256 * 1024 * 1024),
+            ("temp_store", "MEMORY"),
+            ("wal_autocheckpoint", 4000),
+        ),
+        pool_size=20,
+        max_overflow=30,
+        pool_timeout=5,
+        pool_recycle=1800,
+        pool_pre_ping=False,
+        query_cache_size=1000,
+        prepared_statement_cache_size=1024,
+    ),
+)}
+
+DEFAULT_STORAGE_PROFILE = "balanced"
+
+
+def get_storage_profile(name: str) -> StorageProfile:
+    profile = STORAGE_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"알 수 없는 DB_PROFILE: {name} (사용 가능: {', '.join(STORAGE_PROFILES)})")
+    return profile
+
+
+def engine_options(url: str, profile: StorageProfile, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine 에 넘길 인자"""
+    options: Dict[str, Any] = {}
+    if profile.query_cache_size is not None:
+        options["query_cache_size"] = profile.query_cache_size
+
+    if url.startswith("sqlite"):
+        # SQLite 는 파일 DB 이므로 풀 설정 대신 연결마다 PRAGMA 를 적용합니다 (apply_sqlite_pragmas)
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    for key in ("pool_size", "max_overflow", "pool_timeout"):
+        value = getattr(profile, key)
+        if value is not None:
+            options[key] = value
+    options["pool_recycle"] = profile.pool_recycle
+    options["pool_pre_ping"] = profile.pool_pre_ping
+    # URL 에 직접 지정한 값(PgBouncer 용 ?prepared_statement_cache_size=0 등)이 프로필보다 우선합니다
+    # (connect_args 는 URL 쿼리 인자를 덮어쓰므로 URL 에 없을 때만 넣습니다)
+    if (is_async and "+asyncpg" in url and profile.prepared_statement_cache_size is not None
+            and "prepared_statement_cache_size" not in make_url(url).query):
+        options["connect_args"] = {"prepared_statement_cache_size": profile.prepared_statement_cache_size}
+    return options
+
+
+def apply_sqlite_pragmas(target_engine: Engine, profile: StorageProfile):
+    """프로필의 PRAGMA 를 SQLite 연결마다 실행"""
+    if target_engine.dialect.name != "sqlite" or not profile.sqlite_pragmas:
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def set_profile_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in profile.sqlite_pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
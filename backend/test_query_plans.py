@@ -0,0 +1,93 @@
+# 쿼리 실행 계획 회귀 테스트 - backend/test_query_plans.py
+# 마이그레이션으로 만든 SQLite DB 에서 자주 실행되는 쿼리의 EXPLAIN QUERY PLAN 을 확인해
+# 테이블 전체 스캔이나 정렬용 임시 B-tree 로 바뀌면 실패합니다.
+#   실행: cd backend && python -m pytest test_query_plans.py
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+from database import ChatMessage, ChatSession, User, upgrade_database
+import queries
+
+# 전체 스캔되면 안 되는 테이블 (사용자 수/대화량에 비례해 커짐)
+LARGE_TABLES = ("users", "chat_sessions", "chat_messages")
+FULL_SCAN = re.compile(r"^SCAN (%s)\b" % "|".join(LARGE_TABLES))
+# 쿼리마다 테이블 전체를 읽어 임시 인덱스를 만드는 경우 (인덱스가 없다는 뜻)
+AUTOMATIC_INDEX = "AUTOMATIC"
+TEMP_SORT = "USE TEMP B-TREE"
+
+CURSOR = (datetime(2026, 1, 1, 12, 0, 0), 5)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    upgrade_database(url)
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com"} for i in range(1, 4)
+        ])
+        conn.execute(ChatSession.__table__.insert(), [
+            {"id": i, "user_id": i % 3 + 1, "created_at": datetime(2026, 1, 1) + timedelta(hours=i)}
+            for i in range(1, 10)
+        ])
+        conn.execute(ChatMessage.__table__.insert(), [
+            {"session_id": i % 9 + 1, "role": "user", "content": f"m{i}",
+             "timestamp": datetime(2026, 1, 1) + timedelta(minutes=i)}
+            for i in range(100)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    yield engine
+    engine.dispose()
+
+
+def explain(engine, query):
+    """쿼리의 EXPLAIN QUERY PLAN 상세 줄 목록"""
+    compiled = query.compile(dialect=engine.dialect)
+    params = compiled.construct_params()
+    values = []
+    for name in compiled.positiontup:
+        value = params[name]
+        processor = compiled._bind_processors.get(name)
+        values.append(processor(value) if processor else value)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(values)).all()
+    return [row[-1] for row in rows]
+
+
+HOT_QUERIES = {
+    "user_by_username": (lambda: queries.user_by_username_query("user1"), False),
+    "user_by_email": (lambda: queries.user_by_email_query("user1@example.com"), False),
+    "latest_chat_session": (lambda: queries.latest_chat_session_query(1), False),
+    "recent_chat_messages": (lambda: queries.recent_chat_messages_query(1, 10), False),
+    "owned_chat_session": (lambda: queries.owned_chat_session_query(1, 1), False),
+    "chat_messages_page": (lambda: queries.chat_messages_page_query(1, 50), False),
+    "chat_messages_page_cursor": (lambda: queries.chat_messages_page_query(1, 50, before=CURSOR), False),
+    # 채팅 기록은 페이지에 담긴 몇십 행을 마지막에 정렬하므로 임시 정렬은 허용하고 전체 스캔만 막습니다
+    "chat_history_page": (lambda: queries.chat_history_page_query(1, 20, 50), True),
+    "chat_history_page_cursor": (lambda: queries.chat_history_page_query(1, 20, 50, cursor=CURSOR), True),
+    "chat_history_summary": (lambda: queries.chat_history_page_query(1, 20, 50, summary=True), True),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_plan_uses_indexes(engine, name):
+    build, allow_temp_sort = HOT_QUERIES[name]
+    plan = explain(engine, build())
+    described = "\n".join(plan)
+
+    full_scans = [line for line in plan if FULL_SCAN.match(line) or AUTOMATIC_INDEX in line]
+    assert not full_scans, f"{name}: 전체 스캔\n{described}"
+    if not allow_temp_sort:
+        assert not any(TEMP_SORT in line for line in plan), f"{name}: 임시 정렬\n{described}"
+
+
+def test_chat_foreign_keys_cascade(engine):
+    with engine.connect() as conn:
+        for table, referred in (("chat_sessions", "users"), ("chat_messages", "chat_sessions")):
+            foreign_keys = conn.exec_driver_sql(f"PRAGMA foreign_key_list({table})").all()
+            # (id, seq, table, from, to, on_update, on_delete, match)
+            assert [(fk[2], fk[6]) for fk in foreign_keys] == [(referred, "CASCADE")]
@@ -0,0 +1,35 @@
+# 요청 빈도 제한 테스트 - backend/test_rate_limit.py
+# 토큰 버킷의 허용/거절, 분당 개수 0 (비활성) 처리, Retry-After 값 상한을 확인합니다.
+#   실행: cd backend && python -m pytest test_rate_limit.py
+import math
+
+from rate_limit import TokenBucketLimiter, retry_after_header
+
+
+def test_bucket_allows_burst_then_rejects():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+    assert limiter.acquire("user") == 0
+    assert limiter.acquire("user") == 0
+    retry_after = limiter.acquire("user")
+    assert 0 < retry_after <= 1
+    # 다른 사용자는 자기 버킷을 씁니다
+    assert limiter.acquire("other") == 0
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_zero_rate_disables_without_overflow():
+    limiter = TokenBucketLimiter(rate_per_minute=0, burst=2)
+    assert limiter.disabled
+    # burst 가 남아 있어도 처음부터 거절합니다
+    retry_after = limiter.acquire("user")
+    assert math.isinf(retry_after)
+    assert limiter.allowed == 0
+    assert limiter.stats()["disabled"] is True
+    # 무한대도 유한한 Retry-After 로 바뀝니다 (math.ceil(inf) 의 OverflowError 방지)
+    assert retry_after_header(retry_after) == 3600
+
+
+def test_retry_after_header_rounds_up_to_at_least_one_second():
+    assert retry_after_header(0.01) == 1
+    assert retry_after_header(2.1) == 3
+    assert retry_after_header(7200, max_seconds=60) == 60
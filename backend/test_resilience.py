@@ -0,0 +1,221 @@
+# 동시 호출 제한/서킷 브레이커 테스트 - backend/test_resilience.py
+# 대기열 순서, 취소된 대기자 정리, 대기열/대기 시간 초과 거절, AIMD 한도 조절,
+# 서킷 브레이커 상태 전이(시험 호출 실패 시 다시 열림)를 확인합니다.
+#   실행: cd backend && python -m pytest test_resilience.py
+import asyncio
+import time
+
+import pytest
+
+from resilience import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN,
+    AdaptiveConcurrencyLimiter, CircuitBreaker, CircuitOpenError, UpstreamOverloadedError
+)
+
+
+async def settle():
+    """대기 중인 태스크가 깨어날 때까지 이벤트 루프를 몇 번 돌립니다"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def make_limiter(**kwargs) -> AdaptiveConcurrencyLimiter:
+    """기본값은 한도 1 고정 (대기열 동작만 확인하도록 AIMD 가 한도를 늘리지 않게 합니다)"""
+    options = {"initial_limit": 1, "min_limit": 1, "max_limit": 1, "latency_target": 1.0,
+               "max_queue": 2, "queue_timeout": 1.0}
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter(**options)
+
+
+@pytest.mark.asyncio
+async def test_limiter_hands_slots_to_waiters_in_order():
+    limiter = make_limiter()
+    await limiter.acquire()
+    order = []
+
+    async def waiter(name):
+        await limiter.acquire()
+        order.append(name)
+
+    tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 2
+
+    limiter.release(0.01)
+    await settle()
+    assert order == ["a"]
+    assert limiter.in_flight == 1
+
+    limiter.release(0.01)
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b"]
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_when_queue_is_full():
+    limiter = make_limiter(max_queue=1)
+    await limiter.acquire()
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(UpstreamOverloadedError):
+        await limiter.acquire()
+    # 헤징 요청처럼 기다리지 않는 호출은 대기열에 자리가 있어도 바로 거절
+    with pytest.raises(UpstreamOverloadedError):
+        await limiter.acquire(wait=False)
+    assert limiter.shed_queue_full == 2
+
+    limiter.release(0.01)
+    await queued
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_after_queue_timeout():
+    limiter = make_limiter(queue_timeout=0.05)
+    await limiter.acquire()
+
+    with pytest.raises(UpstreamOverloadedError):
+        await limiter.acquire()
+    assert limiter.shed_deadline == 1
+    assert limiter.queue_depth == 0
+
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = make_limiter()
+    await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    survivor = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert limiter.queue_depth == 1
+
+    limiter.release(0.01)
+    await survivor
+    assert limiter.in_flight == 1
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_after_handoff_returns_the_slot():
+    limiter = make_limiter()
+    await limiter.acquire()
+    first = asyncio.create_task(limiter.acquire())
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # 슬롯을 넘겨받은 직후 취소된 대기자는 슬롯을 다음 대기자에게 넘기거나, 슬롯을 가진 채 끝나야 합니다
+    # (Python 3.11 의 wait_for 는 완료와 취소가 겹치면 취소를 무시하기도 하므로 두 경우 모두 허용)
+    limiter.release(0.01)
+    first.cancel()
+    first_result, = await asyncio.gather(first, return_exceptions=True)
+    if not isinstance(first_result, asyncio.CancelledError):
+        limiter.release(0.01)
+    await asyncio.wait_for(second, 1)
+    assert limiter.in_flight == 1
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_decreases_on_overload_and_grows_on_fast_calls():
+    limiter = make_limiter(initial_limit=8, max_limit=10, latency_target=0.5, backoff_ratio=0.5)
+    await limiter.acquire()
+    limiter.release(None, overloaded=True)
+    assert limiter.current_limit == 4
+    # 감소 직후 latency_target 동안은 다시 줄이지 않습니다
+    await limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.current_limit == 4
+
+    # 한도를 절반 이상 쓰는 동안 빠르게 끝난 호출은 한도를 조금씩 늘립니다 (한도만큼 성공하면 +1)
+    for _ in range(3):
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            limiter.release(0.01)
+    assert limiter.current_limit == 5
+    assert limiter.increases == 1
+    assert limiter.in_flight == 0
+
+    # 여유가 있을 때(한도의 절반 미만 사용)는 늘리지 않습니다
+    for _ in range(10):
+        await limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.current_limit == 5
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.release(False, breaker.acquire())
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.release(False, breaker.acquire())
+    breaker.release(True, breaker.acquire())
+    breaker.release(False, breaker.acquire())
+    breaker.release(False, breaker.acquire())
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.release(False, breaker.acquire())
+    assert breaker.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.acquire()
+    assert 0 < error.value.retry_after <= 30
+    assert breaker.rejected == 1
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    probe = breaker.acquire()
+    assert probe is True
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    # 시험 호출이 진행 중이면 다른 호출은 거절
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.release(False, probe)
+    assert breaker.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->open": 1}
+
+
+def test_breaker_successful_probe_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    probe = breaker.acquire()
+    breaker.release(True, probe)
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.acquire() is False
+
+
+def test_breaker_cancelled_probe_allows_a_new_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    # 결과 없이 취소된 시험 호출은 상태를 바꾸지 않고 다음 시험 호출을 허용합니다
+    breaker.release(None, breaker.acquire())
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.acquire() is True
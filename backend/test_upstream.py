@@ -0,0 +1,177 @@
+# 업스트림 요청 합치기 테스트 - backend/test_upstream.py
+# httpx.MockTransport 로 만든 가짜 업스트림에서 같은 요청의 single-flight, 호출자 취소,
+# 스트림 공유(늦게 합류한 구독자, 마지막 구독자가 떠나면 업스트림 종료)를 확인합니다.
+#   실행: cd backend && python -m pytest test_upstream.py
+import asyncio
+import contextlib
+import json
+
+import httpx
+import pytest
+
+from resilience import AdaptiveConcurrencyLimiter
+from upstream import UpstreamClient
+
+PAYLOAD = {"messages": [{"role": "user", "content": "2x + 3 = 11"}]}
+
+
+class FakeUpstream:
+    """release 가 설정될 때까지 응답을 붙잡아 두는 가짜 업스트림 (스트림 조각은 테스트가 words 로 하나씩 넣음)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.streams_closed = 0
+        self.release = asyncio.Event()
+        self.words: asyncio.Queue = asyncio.Queue()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self.sse())
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"choices": [{"message": {"content": f"답변 {self.calls}"}}], "echo": body})
+
+    async def sse(self):
+        try:
+            while True:
+                word = await self.words.get()
+                if word is None:
+                    break
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+        finally:
+            self.streams_closed += 1
+
+
+async def until(condition, timeout: float = 1.0):
+    """조건이 참이 될 때까지 이벤트 루프를 돌립니다"""
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.001)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@contextlib.asynccontextmanager
+async def running_upstream():
+    """가짜 업스트림에 연결된 클라이언트 (동시 호출 한도 포함, 재시도 없음)"""
+    fake = FakeUpstream()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=10)
+    client = UpstreamClient("http://upstream.test/", max_retries=0, limiter=limiter)
+    client.start(transport=httpx.MockTransport(fake.handler))
+    try:
+        yield client, fake
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_posts_share_one_call():
+    async with running_upstream() as (upstream, fake):
+        first = asyncio.create_task(upstream.post(PAYLOAD))
+        second = asyncio.create_task(upstream.post(PAYLOAD))
+        other = asyncio.create_task(upstream.post({"messages": []}))
+        await until(lambda: fake.calls == 2)
+        fake.release.set()
+
+        responses = await asyncio.gather(first, second, other)
+        assert fake.calls == 2
+        assert upstream.coalesced == 1
+        assert responses[0].json() == responses[1].json()
+        assert responses[2].json()["echo"] == {"messages": []}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_the_shared_call():
+    async with running_upstream() as (upstream, fake):
+        leaving = asyncio.create_task(upstream.post(PAYLOAD))
+        staying = asyncio.create_task(upstream.post(PAYLOAD))
+        await until(lambda: fake.calls == 1)
+
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        fake.release.set()
+
+        response = await staying
+        assert response.status_code == 200
+        assert fake.calls == 1
+        assert fake.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_every_waiter_cancels_the_upstream_call():
+    async with running_upstream() as (upstream, fake):
+        waiters = [asyncio.create_task(upstream.post(PAYLOAD)) for _ in range(2)]
+        await until(lambda: fake.calls == 1)
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await until(lambda: fake.cancelled == 1)
+        await until(lambda: upstream.in_flight == 0)
+        assert upstream.limiter.in_flight == 0
+
+        # 취소된 호출은 다음 요청에 재사용되지 않습니다
+        fake.release.set()
+        response = await upstream.post(PAYLOAD)
+        assert response.status_code == 200
+        assert fake.calls == 2
+
+
+async def collect(chunks, into: list):
+    async with contextlib.aclosing(chunks):
+        async for chunk in chunks:
+            if "content" in chunk:
+                into.append(chunk["content"])
+
+
+@pytest.mark.asyncio
+async def test_stream_is_shared_with_a_late_subscriber():
+    async with running_upstream() as (upstream, fake):
+        fake.release.set()
+        early, late = [], []
+        early_task = asyncio.create_task(collect(upstream.stream(PAYLOAD), early))
+        await fake.words.put("x = ")
+        await until(lambda: early == ["x = "])
+
+        # 늦게 합류한 구독자도 처음 조각부터 받습니다
+        late_task = asyncio.create_task(collect(upstream.stream(PAYLOAD), late))
+        await until(lambda: late == ["x = "])
+        await fake.words.put("4")
+        await fake.words.put(None)
+        await asyncio.gather(early_task, late_task)
+
+        assert early == late == ["x = ", "4"]
+        assert fake.calls == 1
+        assert upstream.coalesced == 1
+        assert upstream.limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_stays_open_until_the_last_subscriber_leaves():
+    async with running_upstream() as (upstream, fake):
+        fake.release.set()
+        first = upstream.stream(PAYLOAD)
+        second = upstream.stream(PAYLOAD)
+        await fake.words.put("x = ")
+        assert (await first.__anext__())["content"] == "x = "
+        assert (await second.__anext__())["content"] == "x = "
+
+        # 한 구독자가 떠나도 다른 구독자는 계속 받습니다
+        await first.aclose()
+        await fake.words.put("4")
+        assert (await second.__anext__())["content"] == "4"
+        assert fake.streams_closed == 0
+
+        # 마지막 구독자가 떠나면 업스트림 응답을 닫고 호출 슬롯을 돌려줍니다
+        await second.aclose()
+        await until(lambda: fake.streams_closed == 1)
+        await until(lambda: upstream.in_flight == 0)
+        assert upstream.limiter.in_flight == 0
+        assert fake.calls == 1
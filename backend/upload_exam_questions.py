@@ -3,7 +3,8 @@ import os
 import base64
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from main import ExamQuestion, Base
+from database import ExamQuestion, ExamQuestionImage, bump_data_version, upgrade_database, EXAM_QUESTIONS_VERSION_KEY
+from exam_store import generate_image_derivatives
 import logging
 import re
 
@@ -58,6 +59,18 @@ def extract_question_number_from_filename(filename):
         logger.error(f"파일명 처리 오류 ({filename}): {e}")
         return None
 
+def store_image_derivatives(db, question_number, image_data):
+    """문제 이미지의 축소/WebP 변형본을 새로 만들어 저장 (기존 변형본은 교체)"""
+    db.query(ExamQuestionImage).filter(
+        ExamQuestionImage.question_number == question_number
+    ).delete()
+    derivatives = generate_image_derivatives(image_data)
+    for derivative in derivatives:
+        db.add(ExamQuestionImage(question_number=question_number, **derivative))
+    summary = ", ".join(f"{d['variant']} {d['width']}px {len(d['data'])} bytes" for d in derivatives)
+    logger.info(f"  🖼️  변형본 {len(derivatives)}개 생성: {summary}")
+    return len(derivatives)
+
 def upload_exam_images(image_folder_path):
     """이미지 폴더에서 수능 문제 이미지들을 데이터베이스에 업로드 (수정된 버전)"""
     
@@ -122,12 +135,16 @@ def upload_exam_images(image_folder_path):
                     success_count += 1
                     logger.info(f"  ✅ 문제 {question_number}번 신규 추가")
                 
+                # 모바일 등 작은 화면용 축소/WebP 변형본 미리 생성
+                store_image_derivatives(db, question_number, image_data)
+                
             except Exception as e:
                 logger.error(f"  ❌ {filename} 처리 실패: {e}")
                 error_count += 1
                 continue
         
-        # 변경사항 저장
+        # 변경사항 저장 (실행 중인 서버가 문제 저장소를 다시 로드하도록 버전 갱신)
+        bump_data_version(db, EXAM_QUESTIONS_VERSION_KEY)
         db.commit()
         
         logger.info("=" * 50)
@@ -147,6 +164,26 @@ def upload_exam_images(image_folder_path):
     finally:
         db.close()
 
+def regenerate_image_derivatives():
+    """이미 업로드된 모든 문제 이미지의 변형본 재생성"""
+    db = SessionLocal()
+    try:
+        questions = db.query(ExamQuestion).filter(ExamQuestion.question_image.isnot(None)).all()
+        total = 0
+        for question in questions:
+            logger.info(f"변형본 생성 중: 문제 {question.question_number}번")
+            total += store_image_derivatives(db, question.question_number, question.question_image)
+        bump_data_version(db, EXAM_QUESTIONS_VERSION_KEY)
+        db.commit()
+        logger.info(f"🖼️  {len(questions)}개 문제, 변형본 {total}개 생성 완료")
+        return True
+    except Exception as e:
+        logger.error(f"변형본 생성 실패: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
 def verify_uploaded_images():
     """업로드된 이미지 확인"""
     db = SessionLocal()
@@ -203,6 +240,8 @@ def clear_all_questions():
     db = SessionLocal()
     try:
         deleted_count = db.query(ExamQuestion).delete()
+        db.query(ExamQuestionImage).delete()
+        bump_data_version(db, EXAM_QUESTIONS_VERSION_KEY)
         db.commit()
         logger.info(f"🗑️  모든 문제 삭제 완료: {deleted_count}개")
         return True
@@ -218,6 +257,9 @@ def main():
     print("🎓 수능 문제 이미지 업로드 도구 (수정된 버전)")
     print("=" * 50)
     
+    # 서버와 별개로 실행되므로 스키마를 직접 최신 버전으로 올립니다
+    upgrade_database(DATABASE_URL)
+    
     # 사용법 안내
     print("✨ 주요 수정사항:")
     print("- 파일명에서 실제 문제 번호를 추출하여 정확히 매칭")
@@ -236,9 +278,10 @@ def main():
         print("2. 업로드된 문제 확인")
         print("3. 파일명 추출 테스트")
         print("4. 모든 문제 삭제 (주의!)")
-        print("5. 종료")
+        print("5. 이미지 변형본 재생성")
+        print("6. 종료")
         
-        choice = input("선택 (1-5): ").strip()
+        choice = input("선택 (1-6): ").strip()
         
         if choice == "1":
             image_folder = input("이미지 폴더 경로를 입력하세요: ").strip()
@@ -271,11 +314,17 @@ def main():
                 print("삭제 취소됨")
                 
         elif choice == "5":
+            if regenerate_image_derivatives():
+                print("✅ 변형본 재생성 완료!")
+            else:
+                print("❌ 변형본 재생성 실패!")
+                
+        elif choice == "6":
             print("👋 프로그램 종료")
             break
             
         else:
-            print("❌ 잘못된 선택입니다. 1-5 중 선택해주세요.")
+            print("❌ 잘못된 선택입니다. 1-6 중 선택해주세요.")
         
         print()
 
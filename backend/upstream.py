@@ -0,0 +1,494 @@
+# 업스트림 AI API 클라이언트 - backend/upstream.py
+# 요청마다 새 연결을 만들지 않도록 앱 수명 동안 하나의 httpx 클라이언트를 공유합니다.
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from metrics import UPSTREAM_SECONDS
+from resilience import AdaptiveConcurrencyLimiter, CircuitBreaker, LatencyWindow, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# 업스트림이 요청을 처리하지 않았다고 볼 수 있어 다시 보내도 되는 응답 코드와 오류
+RETRYABLE_STATUS = {429, 502, 503, 504}
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+# 동시 호출 한도를 줄이는 과부하 신호로 보는 응답 코드
+OVERLOAD_STATUS = {429, 503, 504}
+
+
+def is_failure_status(status_code: int) -> bool:
+    """서킷 브레이커가 업스트림 장애로 세는 응답 코드"""
+    return status_code >= 500 or status_code == 429
+
+
+def attempt_outcome(status_code: int) -> str:
+    """upstream_request_duration_seconds 의 outcome 레이블 (ok 또는 http_<코드>)"""
+    return "ok" if status_code < 400 else f"http_{status_code}"
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class UpstreamError(Exception):
+    """업스트림이 오류 본문을 반환한 경우"""
+
+
+def payload_key(payload: Any) -> str:
+    """요청 본문이 같은지 비교하기 위한 해시"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _SharedCall:
+    """같은 요청을 기다리는 호출자들이 함께 사용하는 하나의 업스트림 호출"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _SharedStream:
+    """하나의 업스트림 스트림을 여러 구독자에게 나눠 주는 중계기
+
+    늦게 합류한 구독자도 처음 조각부터 받으며, 모든 구독자가 떠나면 업스트림 스트림을 닫습니다.
+    """
+
+    def __init__(self, source: AsyncIterator[Dict[str, Any]]):
+        self.chunks: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._pump(source))
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source: AsyncIterator[Dict[str, Any]]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = UpstreamError("업스트림 스트림이 취소되었습니다")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.task.cancel()
+
+
+class UpstreamClient:
+    """연결 풀과 keep-alive 를 공유하는 업스트림 HTTP 클라이언트
+
+    coalesce 가 켜져 있으면 동시에 진행 중인 같은 요청 본문은 하나의 업스트림 호출을 함께 기다립니다
+    (single-flight). 오류는 기다리던 모든 호출자에게 전달되고, 한 호출자가 취소되어도 다른 호출자가
+    남아 있으면 업스트림 호출은 계속되며, 마지막 호출자가 떠나면 취소됩니다.
+
+    연결 실패나 429/502/503/504 응답은 지터가 들어간 지수 백오프로 max_retries 번까지 다시 보내고
+    (스트림은 첫 조각을 받기 전까지만), hedge 가 켜져 있으면 최근 p95 지연이 지나도록 응답이 없는
+    요청에 같은 요청을 하나 더 보내 먼저 온 응답을 사용합니다. 연속 실패가 쌓이면 서킷 브레이커가
+    열려 업스트림이 복구될 때까지 CircuitOpenError 로 바로 실패합니다.
+    limiter 가 있으면 실제 HTTP 요청마다 동시 호출 슬롯을 확보하며, 한도가 차 대기열에서도 밀려나면
+    UpstreamOverloadedError 로 바로 실패합니다 (헤징 요청은 기다리지 않고 슬롯이 없으면 보내지 않음).
+    """
+
+    def __init__(self, url: str, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = False, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, write_timeout: float = 10.0, pool_timeout: float = 5.0,
+                 coalesce: bool = True, max_retries: int = 2, retry_base_delay: float = 0.2,
+                 retry_max_delay: float = 2.0, hedge: bool = False, hedge_min_delay: float = 0.5,
+                 hedge_min_samples: int = 20, breaker_failure_threshold: int = 5,
+                 breaker_reset_timeout: float = 30.0,
+                 limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        self.url = url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self.http2 = http2
+        self.coalesce = coalesce
+        self.in_flight = 0
+        self.requests = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _SharedCall] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.retries = 0
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = max(1, hedge_min_samples)
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.breaker = CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout)
+        self.limiter = limiter
+        # 개별 요청 지연 (헤징 기준), 재시도/헤징을 포함한 호출 전체 지연, 스트림 첫 조각까지의 지연
+        self.attempt_latency = LatencyWindow()
+        self.latency = LatencyWindow()
+        self.first_chunk_latency = LatencyWindow()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """앱 시작 시 클라이언트 생성 (transport 는 테스트에서 httpx.MockTransport 를 넣을 때 사용)"""
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 사용 설정이지만 h2 패키지가 없어 HTTP/1.1 로 연결합니다 (pip install httpx[http2])")
+            self.http2 = False
+        self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2, transport=transport)
+        logger.info(
+            f"업스트림 클라이언트 시작: 최대 연결 {self.limits.max_connections}, "
+            f"keep-alive {self.limits.max_keepalive_connections}개/{self.limits.keepalive_expiry}s, "
+            f"HTTP/2 {'사용' if self.http2 else '미사용'}"
+        )
+
+    async def close(self):
+        """앱 종료 시 열린 연결 정리"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("업스트림 클라이언트가 시작되지 않았습니다")
+        return self._client
+
+    async def post(self, payload: Any) -> httpx.Response:
+        """업스트림에 JSON 요청 전송 (공유 연결 풀 사용, 진행 중인 같은 요청이 있으면 그 결과를 함께 사용)"""
+        if not self.coalesce:
+            return await self._post(payload)
+        return await self._single_flight(payload_key(payload), lambda: self._post(payload))
+
+    async def _single_flight(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        shared = self._calls.get(key)
+        if shared is None:
+            shared = _SharedCall(asyncio.create_task(call()))
+            self._calls[key] = shared
+            shared.task.add_done_callback(lambda task: self._finish_call(key, shared))
+        else:
+            self.coalesced += 1
+
+        shared.waiters += 1
+        try:
+            # shield: 이 호출자가 취소되어도 다른 호출자를 위해 업스트림 호출은 계속 진행
+            return await asyncio.shield(shared.task)
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                shared.task.cancel()
+
+    def _finish_call(self, key: str, shared: _SharedCall):
+        if self._calls.get(key) is shared:
+            del self._calls[key]
+        # 기다리는 호출자가 모두 떠난 뒤 실패한 경우에도 경고가 남지 않도록 예외를 회수합니다
+        if not shared.task.cancelled():
+            shared.task.exception()
+
+    async def _post(self, payload: Any) -> httpx.Response:
+        """서킷 브레이커 확인 → (헤징) 요청 → 재시도 가능한 실패면 백오프 후 다시 요청"""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            probe = self.breaker.acquire()
+            response: Optional[httpx.Response] = None
+            success = None
+            retry = False
+            try:
+                response = await self._hedged_send(payload)
+                success = not is_failure_status(response.status_code)
+                retry = response.status_code in RETRYABLE_STATUS
+            except RETRYABLE_ERRORS:
+                success = False
+                retry = True
+                if attempt >= self.max_retries:
+                    raise
+            except httpx.TransportError:
+                success = False
+                raise
+            finally:
+                self.breaker.release(success, probe)
+
+            if not retry or attempt >= self.max_retries:
+                self.latency.record((time.perf_counter() - started) * 1000)
+                return response
+
+            delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+            if response is not None:
+                # 429/503 의 Retry-After 는 최대 대기 시간 안에서만 따릅니다
+                hint = retry_after_seconds(response)
+                if hint is not None:
+                    delay = max(delay, min(hint, self.retry_max_delay))
+            attempt += 1
+            self.retries += 1
+            logger.info(f"업스트림 요청 재시도 {attempt}/{self.max_retries} ({delay * 1000:.0f}ms 후)")
+            await asyncio.sleep(delay)
+
+    def hedge_delay(self) -> Optional[float]:
+        """헤징 요청을 보내기까지 기다릴 시간 (초, 표본이 부족하거나 꺼져 있으면 None)"""
+        if not self.hedge or len(self.attempt_latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.attempt_latency.percentile(95) / 1000)
+
+    async def _hedged_send(self, payload: Any) -> httpx.Response:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(payload)
+
+        primary = asyncio.create_task(self._send(payload))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            # p95 가 지나도록 응답이 없으면 같은 요청을 하나 더 보내고 먼저 성공한 응답을 사용
+            self.hedged += 1
+            hedge = asyncio.create_task(self._send(payload, wait=False))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, payload: Any, wait: bool = True) -> httpx.Response:
+        if self.limiter:
+            await self.limiter.acquire(wait)
+        self.in_flight += 1
+        self.requests += 1
+        started = time.perf_counter()
+        latency = None
+        overloaded = False
+        outcome = "cancelled"
+        try:
+            response = await self.client.post(self.url, json=payload)
+            latency = time.perf_counter() - started
+            overloaded = response.status_code in OVERLOAD_STATUS
+            outcome = attempt_outcome(response.status_code)
+        except httpx.TimeoutException:
+            overloaded = True
+            outcome = "timeout"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.in_flight -= 1
+            if self.limiter:
+                self.limiter.release(latency, overloaded)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind="post", outcome=outcome)
+        if not is_failure_status(response.status_code):
+            self.attempt_latency.record((time.perf_counter() - started) * 1000)
+        return response
+
+    async def stream(self, payload: Any) -> AsyncIterator[Dict[str, Any]]:
+        """업스트림 응답을 조각 단위로 전달합니다.
+
+        {"content": 텍스트 조각} 또는 {"usage": 사용량} 딕셔너리를 순서대로 내보냅니다.
+        업스트림이 SSE(text/event-stream) 로 응답하면 OpenAI 형식의 delta 를 그대로 흘려보내고,
+        일반 JSON 으로 응답하면 전체 답변을 하나의 조각으로 내보냅니다.
+        진행 중인 같은 요청이 있으면 그 스트림을 처음 조각부터 함께 받습니다.
+        """
+        if not self.coalesce:
+            async for chunk in self._stream(payload):
+                yield chunk
+            return
+
+        key = payload_key(payload)
+        shared = self._streams.get(key)
+        if shared is None:
+            shared = _SharedStream(self._stream(payload))
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda task: self._finish_stream(key, shared))
+        else:
+            self.coalesced += 1
+        async for chunk in shared.subscribe():
+            yield chunk
+
+    def _finish_stream(self, key: str, shared: _SharedStream):
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    async def _stream(self, payload: Any) -> AsyncIterator[Dict[str, Any]]:
+        """서킷 브레이커 확인 후 스트림 요청 (첫 조각을 받기 전의 재시도 가능한 실패만 다시 요청)"""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            probe = self.breaker.acquire()
+            success = None
+            yielded = False
+            chunks = self._stream_once(payload)
+            try:
+                async for chunk in chunks:
+                    if not yielded:
+                        self.first_chunk_latency.record((time.perf_counter() - started) * 1000)
+                        yielded = True
+                    yield chunk
+                success = True
+                return
+            except httpx.HTTPStatusError as e:
+                success = not is_failure_status(e.response.status_code)
+                if e.response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise
+            except RETRYABLE_ERRORS:
+                success = False
+                if yielded or attempt >= self.max_retries:
+                    raise
+            except httpx.TransportError:
+                success = False
+                raise
+            finally:
+                self.breaker.release(success, probe)
+                # 호출자가 중간에 떠나도 업스트림 응답이 바로 닫히도록 명시적으로 정리
+                await chunks.aclose()
+
+            delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+            attempt += 1
+            self.retries += 1
+            logger.info(f"업스트림 스트림 재시도 {attempt}/{self.max_retries} ({delay * 1000:.0f}ms 후)")
+            await asyncio.sleep(delay)
+
+    async def _stream_once(self, payload: Any) -> AsyncIterator[Dict[str, Any]]:
+        """스트림 요청 한 번 (동시 호출 한도의 지연 표본은 첫 조각까지의 시간)"""
+        if self.limiter:
+            await self.limiter.acquire()
+        self.in_flight += 1
+        self.requests += 1
+        started = time.perf_counter()
+        latency = None
+        overloaded = False
+        # 호출자가 끝까지 읽지 않고 닫으면 cancelled 로 남습니다
+        outcome = "cancelled"
+        try:
+            async with self.client.stream(
+                "POST", self.url, json=payload, headers={"Accept": "text/event-stream"}
+            ) as response:
+                overloaded = response.status_code in OVERLOAD_STATUS
+                outcome = attempt_outcome(response.status_code)
+                response.raise_for_status()
+                outcome = "cancelled"
+                content_type = response.headers.get("content-type", "")
+
+                if "text/event-stream" not in content_type:
+                    data = json.loads(await response.aread())
+                    if "error" in data:
+                        raise UpstreamError(data["error"].get("message", "Unknown API error"))
+                    latency = time.perf_counter() - started
+                    outcome = "ok"
+                    yield {"content": data["choices"][0]["message"]["content"]}
+                    if data.get("usage"):
+                        yield {"usage": data["usage"]}
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if "error" in chunk:
+                        raise UpstreamError(chunk["error"].get("message", "Unknown API error"))
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta") or choice.get("message") or {}
+                        if delta.get("content"):
+                            if latency is None:
+                                latency = time.perf_counter() - started
+                            yield {"content": delta["content"]}
+                    if chunk.get("usage"):
+                        yield {"usage": chunk["usage"]}
+                if latency is None:
+                    latency = time.perf_counter() - started
+                outcome = "ok"
+        except httpx.TimeoutException:
+            overloaded = True
+            outcome = "timeout"
+            raise
+        except httpx.HTTPStatusError:
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.in_flight -= 1
+            if self.limiter:
+                self.limiter.release(latency, overloaded)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind="stream", outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        """연결 풀 점유 현황, 재시도/헤징 횟수, 지연 분위수, 서킷 브레이커 상태"""
+        hedge_delay = self.hedge_delay()
+        stats: Dict[str, Any] = {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "shared_calls": len(self._calls) + len(self._streams),
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": round(hedge_delay * 1000, 1) if hedge_delay is not None else None,
+            "latency_ms": self.latency.stats(),
+            "attempt_latency_ms": self.attempt_latency.stats(),
+            "stream_first_chunk_ms": self.first_chunk_latency.stats(),
+            "circuit": self.breaker.stats(),
+            "concurrency": self.limiter.stats() if self.limiter else None,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "http2": self.http2,
+        }
+        # httpcore 연결 풀 내부 상태는 공개 API 가 아니므로 가능한 경우에만 보고합니다
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+            stats["queued_requests"] = sum(
+                1 for request in getattr(pool, "_requests", []) if getattr(request, "connection", None) is None
+            )
+        return stats
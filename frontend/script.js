@@ -378,29 +378,19 @@ async function sendMessage() {
     showLoading(true);
 
     try {
-        const response = await fetch(`${API_BASE_URL}/chat`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Authorization': `Bearer ${authToken}`
-            },
-            body: JSON.stringify({
-                message: message || "이 수학 문제를 단계별로 풀어주세요.",
-                image_data: uploadedImageData
-            })
+        const result = await streamChatResponse({
+            message: message || "이 수학 문제를 단계별로 풀어주세요.",
+            image_data: uploadedImageData
         });
 
-        const data = await response.json();
-
-        if (response.ok) {
-            addMessage('assistant', data.response);
+        if (result.ok) {
             console.log('AI 응답 받음');
         } else {
-            if (response.status === 401) {
+            if (result.status === 401) {
                 logout();
                 showError('로그인이 만료되었습니다. 다시 로그인해주세요.');
             } else {
-                showError(data.detail || '메시지 전송에 실패했습니다.');
+                showError(result.detail || '메시지 전송에 실패했습니다.');
             }
         }
     } catch (error) {
@@ -416,6 +406,90 @@ async function sendMessage() {
     }
 }
 
+/**
+ * 스트리밍 채팅 요청 (SSE) - 응답 토큰을 받는 대로 화면에 표시
+ */
+async function streamChatResponse(payload) {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${authToken}`
+        },
+        body: JSON.stringify(payload)
+    });
+
+    if (!response.ok) {
+        let detail = null;
+        try {
+            detail = (await response.json()).detail;
+        } catch (error) {
+            detail = null;
+        }
+        return { ok: false, status: response.status, detail: detail };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const messagesContainer = document.getElementById('chatMessages');
+    let buffer = '';
+    let content = '';
+    let bubble = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+            let eventType = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event: ')) {
+                    eventType = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
+                }
+            }
+            if (!data) continue;
+
+            const parsed = JSON.parse(data);
+            if (eventType === 'delta') {
+                content += parsed.content;
+                // 첫 토큰이 도착하면 로딩 표시 대신 답변 말풍선을 보여줍니다
+                if (!bubble) {
+                    showLoading(false);
+                    bubble = addMessage('assistant', '');
+                }
+                bubble.innerHTML = convertMarkdownToHtml(content);
+                if (messagesContainer) {
+                    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                }
+            } else if (eventType === 'done') {
+                return { ok: true, content: content };
+            } else if (eventType === 'error') {
+                markIncompleteAnswer(bubble, content);
+                return { ok: false, status: 500, detail: parsed.detail };
+            }
+        }
+    }
+
+    // done 이벤트 없이 끝난 스트림 (연결 끊김, 프록시 타임아웃)은 저장되지 않은 미완성 답변입니다
+    markIncompleteAnswer(bubble, content);
+    return { ok: false, status: 0, detail: '응답이 중간에 끊어졌습니다. 다시 시도해주세요.' };
+}
+
+/**
+ * 미완성 답변 말풍선에 중단 표시
+ */
+function markIncompleteAnswer(bubble, content) {
+    if (!bubble) return;
+    bubble.innerHTML = convertMarkdownToHtml(content) + '<p><em>(답변이 완료되지 않았습니다)</em></p>';
+}
+
 /**
  * 이미지만으로 자동 전송
  */
@@ -429,29 +503,19 @@ async function sendImageMessage() {
     showLoading(true);
 
     try {
-        const response = await fetch(`${API_BASE_URL}/chat`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Authorization': `Bearer ${authToken}`
-            },
-            body: JSON.stringify({
-                message: "이 수학 문제를 단계별로 풀어주세요.",
-                image_data: uploadedImageData
-            })
+        const result = await streamChatResponse({
+            message: "이 수학 문제를 단계별로 풀어주세요.",
+            image_data: uploadedImageData
         });
 
-        const data = await response.json();
-
-        if (response.ok) {
-            addMessage('assistant', data.response);
+        if (result.ok) {
             console.log('이미지 기반 AI 응답 받음');
         } else {
-            if (response.status === 401) {
+            if (result.status === 401) {
                 logout();
                 showError('로그인이 만료되었습니다. 다시 로그인해주세요.');
             } else {
-                showError(data.detail || '이미지 분석에 실패했습니다.');
+                showError(result.detail || '이미지 분석에 실패했습니다.');
             }
         }
     } catch (error) {
@@ -505,8 +569,13 @@ async function handleExamQuestion(message, input, sendBtn) {
             questionDisplay += `📝 문제:\n${data.question_text}\n\n`;
             
             // 이미지가 있다면 추가 처리
-            if (data.question_image) {
-                const imageUrl = `data:image/png;base64,${data.question_image}`;
+            if (data.question_image_url) {
+                // 이미지는 별도 GET 요청으로 받아 브라우저 캐시를 활용합니다
+                // 채팅 영역 너비 × 화면 배율 만큼만 요청해 모바일에서 작은 변형본을 받습니다
+                const messagesContainer = document.getElementById('chatMessages');
+                const displayWidth = messagesContainer ? messagesContainer.clientWidth : window.innerWidth;
+                const targetWidth = Math.round(displayWidth * (window.devicePixelRatio || 1));
+                const imageUrl = `${API_BASE_URL}${data.question_image_url}&w=${targetWidth}`;
                 addMessageWithImage('assistant', questionDisplay, imageUrl);
             } else {
                 addMessage('assistant', questionDisplay);
@@ -569,6 +638,8 @@ function addMessage(role, content) {
         messageDiv.style.opacity = '1';
         messageDiv.style.transform = 'translateY(0)';
     }, 100);
+
+    return bubbleDiv;
 }
 
 /**
@@ -717,7 +788,7 @@ async function loadChatHistory() {
     console.log('채팅 기록 로드 중...');
 
     try {
-        const response = await fetch(`${API_BASE_URL}/chat-history`, {
+        const response = await fetch(`${API_BASE_URL}/chat-history?limit=1&messages_per_session=20`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }